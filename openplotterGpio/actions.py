@@ -17,6 +17,8 @@
 
 import os, subprocess, pigpio
 from openplotterSettings import language
+from . import config
+from . import control
 
 class Actions:
 	def __init__(self,conf,currentLanguage):
@@ -27,24 +29,25 @@ class Actions:
 		else: self.debug = False
 		self.available = []
 
-		data = self.conf.get('GPIO', 'digital')
-		try: digitalList = eval(data)
-		except: digitalList = {}
+		settings = config.load(self.conf)
+		digitalList = settings.digital
+		groups = []
 		if digitalList:
 			for i in digitalList:
-				items = i.split('-')
-				host = items[0]
-				gpio = items[1]
-				if digitalList[i]['mode'] == 'out':
+				host = digitalList[i].host
+				gpio = str(digitalList[i].gpio)
+				if digitalList[i].mode == 'out':
 					self.available.append({'ID':i+'-high','name': host+'-'+'GPIO'+gpio+': '+_('turn it high'),"module": "openplotterGpio",'data':True,'default':'state=alert\nmessage=GPIO'+gpio+' is high\nsound=no\nvisual=yes','help':_('Allowed values for state:')+' normal, alert, warn, alarm, emergency'})
 					self.available.append({'ID':i+'-low','name': host+'-'+'GPIO'+gpio+': '+_('turn it low'),"module": "openplotterGpio",'data':True,'default':'state=normal\nmessage=GPIO'+gpio+' is low\nsound=no\nvisual=yes','help':_('Allowed values for state:')+' normal, alert, warn, alarm, emergency'})
+					if digitalList[i].group and not digitalList[i].group in groups: groups.append(digitalList[i].group)
+		for group in groups:
+			self.available.append({'ID':'group-'+group+'-high','name': _('GPIO group')+' '+group+': '+_('turn it high'),"module": "openplotterGpio",'data':True,'default':'state=alert\nmessage=GPIO group '+group+' is high\nsound=no\nvisual=yes','help':_('Allowed values for state:')+' normal, alert, warn, alarm, emergency'})
+			self.available.append({'ID':'group-'+group+'-low','name': _('GPIO group')+' '+group+': '+_('turn it low'),"module": "openplotterGpio",'data':True,'default':'state=normal\nmessage=GPIO group '+group+' is low\nsound=no\nvisual=yes','help':_('Allowed values for state:')+' normal, alert, warn, alarm, emergency'})
 
-		data = self.conf.get('GPIO', 'pulses')
-		try: pulsesList = eval(data)
-		except: pulsesList = {}
+		pulsesList = settings.pulses
 		if pulsesList:
 			for i in pulsesList:
-				if pulsesList[i]['revCounter'] or pulsesList[i]['distance']:
+				if pulsesList[i].resettable:
 					self.available.append({'ID':i+'-reset','name': 'GPIO'+i+': '+_('reset counter and distance'),"module": "openplotterGpio",'data':False,'default':'','help':''})
 
 	def run(self,action,data):
@@ -53,34 +56,59 @@ class Actions:
 			message = ''
 			sound = False
 			visual = False
-			if '-high' in action or '-low' in action:
+			if action.startswith('group-'):
+				name, turn = action[6:].rsplit('-', 1)
+				state, message, sound, visual = self.notification(data)
+				if turn == 'high': level = 1
+				else: level = 0
+				try: 
+					result = control.request(self.conf, {'command':'group','name':name,'level':level,'notification':{'state':state,'message':message,'visual':visual,'sound':sound}})
+					if self.debug: print('GPIO group '+name+': '+str(result['pins'])+' pins on '+str(result['hosts'])+' hosts changed within '+str(result['spread'])+' ms')
+					return
+				except (FileNotFoundError, ConnectionRefusedError) as e: 
+					if self.debug: print('openplotter-gpio-read not available for actions: '+str(e))
+				except Exception as e:
+					# the reader got the request and may still carry it out, doing it here too would repeat it
+					if self.debug: print('Error processing openplotter-gpio actions in openplotter-gpio-read: '+str(e))
+					return
+				if not self.bank(name, level): return
+				key = 'notifications.GPIOgroup.'+name
+			elif '-high' in action or '-low' in action:
 				items = action.split('-')
 				host = items[0]
 				gpio = int(items[1])
 				turn = items[2]
-				data0 = self.conf.get('GPIO', 'digital')
-				try: digitalList = eval(data0)
-				except: digitalList = {}
+				state, message, sound, visual = self.notification(data)
+				if turn == 'high': level = 1
+				else: level = 0
+				# the running reader switches it on its open pigpiod connection and sends the notification itself
+				try: 
+					control.request(self.conf, {'command':'write','host':host,'gpio':gpio,'level':level,'notification':{'state':state,'message':message,'visual':visual,'sound':sound}})
+					return
+				except (FileNotFoundError, ConnectionRefusedError) as e: 
+					if self.debug: print('openplotter-gpio-read not available for actions: '+str(e))
+				except Exception as e:
+					if self.debug: print('Error processing openplotter-gpio actions in openplotter-gpio-read: '+str(e))
+					return
+				digitalList = config.load(self.conf).digital
 				if host+'-'+str(gpio) in digitalList:
 					pi = pigpio.pi(host)
 					pi.set_mode(gpio, pigpio.OUTPUT)
-					if turn == 'high': pi.write(gpio,1)
-					elif turn == 'low': pi.write(gpio,0)
+					pi.write(gpio,level)
 					pi.stop()
 					key = 'notifications.GPIO'+str(gpio)
-					lines = data.split('\n')
-					for i in lines:
-						line = i.split('=')
-						if line[0].strip() == 'state': state = line[1].strip()
-						elif line[0].strip() == 'message': message = line[1].strip()
-						elif line[0].strip() == 'sound':
-							if line[1].strip()=="yes": sound = True
-						elif line[0].strip() == 'visual':
-							if line[1].strip()=="yes": visual = True
 				else: return
 			elif '-reset' in action:
 				items = action.split('-')
 				gpio = items[0]
+				try: 
+					control.request(self.conf, {'command':'reset','gpio':gpio})
+					return
+				except (FileNotFoundError, ConnectionRefusedError) as e: 
+					if self.debug: print('openplotter-gpio-read not available for actions: '+str(e))
+				except Exception as e:
+					if self.debug: print('Error processing openplotter-gpio actions in openplotter-gpio-read: '+str(e))
+					return
 				key = 'notifications.GPIO'+gpio+'.reset'
 				state = 'normal'
 				message = 'request'
@@ -100,4 +128,39 @@ class Actions:
 					print('Error setting notification: '+str(err))
 
 		except Exception as e: 
-			if self.debug: print('Error processing openplotter-gpio actions: '+str(e))
\ No newline at end of file
+			if self.debug: print('Error processing openplotter-gpio actions: '+str(e))
+
+	def notification(self,data):
+		state = ''
+		message = ''
+		sound = False
+		visual = False
+		lines = data.split('\n')
+		for i in lines:
+			line = i.split('=')
+			if line[0].strip() == 'state': state = line[1].strip()
+			elif line[0].strip() == 'message': message = line[1].strip()
+			elif line[0].strip() == 'sound':
+				if line[1].strip()=="yes": sound = True
+			elif line[0].strip() == 'visual':
+				if line[1].strip()=="yes": visual = True
+		return state, message, sound, visual
+
+	def bank(self,name,level):
+		# one set_bank_1/clear_bank_1 per host so the pins of a group change together
+		digitalList = config.load(self.conf).digital
+		hosts = {}
+		for i in digitalList:
+			if digitalList[i].mode == 'out' and digitalList[i].group == name:
+				if digitalList[i].host in hosts: hosts[digitalList[i].host].append(digitalList[i].gpio)
+				else: hosts[digitalList[i].host] = [digitalList[i].gpio]
+		for host in hosts:
+			pi = pigpio.pi(host)
+			mask = 0
+			for gpio in hosts[host]:
+				pi.set_mode(gpio, pigpio.OUTPUT)
+				mask |= 1 << gpio
+			if level: pi.set_bank_1(mask)
+			else: pi.clear_bank_1(mask)
+			pi.stop()
+		return hosts
\ No newline at end of file
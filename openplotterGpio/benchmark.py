@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+# python3 -m openplotterGpio.benchmark [channels]
+# python3 -m openplotterGpio.benchmark reader threaded|asyncio channels seconds (one design, run by the one above)
+# prints one JSON line per measurement with sorted keys, no hardware or Signal K needed.
+# us is the time per run in microseconds, compare lines with the same benchmark and parameters.
+
+import sys, os, json, time, timeit, tempfile, threading, asyncio, subprocess
+from . import config
+from . import metrics
+
+def result(name, seconds, runs, **extra):
+	data = {'benchmark': name, 'us': round(seconds/runs*1e6, 3), 'runs': runs}
+	data.update(extra)
+	print(json.dumps(data, sort_keys=True))
+
+def settings(channels):
+	oneW = {}
+	pulses = {}
+	digital = {}
+	for i in range(channels):
+		oneW['28-00000000000'+str(i)] = {'sk':'environment.inside.temperature'+str(i),'rate':1.0,'offset':0.0,'resolution':12,'deadband':0.1,'relative':False,'heartbeat':30.0}
+		pulses[str(i+2)] = {'rate': 1.0, 'pulsesPerRev': 2, 'pull': 'up', 'revCounter': 'propulsion.'+str(i)+'.revolutionsCounter', 'revolutions': 'propulsion.'+str(i)+'.revolutions', 'radius': 0.1, 'calibration': 1.0, 'linearSpeed': 'navigation.speedThroughWater', 'distance': 'navigation.log', 'engine': 'pigpio', 'average': 4, 'mode': 'period', 'gate': 1.0, 'reject': 10.0, 'deadband': 0.0, 'relative': False, 'heartbeat': 0.0}
+		digital['localhost-'+str(i+2)] = {"mode":"in","pull": 'up', "init": True, "high":{"state":'alert',"message":'high',"visual":True,"sound":False},"low":{"state":'normal',"message":'low',"visual":False,"sound":False}}
+	return str(oneW), str(pulses), str(digital)
+
+class fakeConf:
+	def __init__(self, folder, data):
+		self.conf_folder = folder
+		self.data = data
+		with open(folder+'/openplotter.conf', 'w') as f: f.write('[GPIO]\n')
+	def get(self, section, key):
+		return self.data[key]
+
+def configLoad(channels, runs):
+	oneW, pulses, digital = settings(channels)
+	def old():
+		for data in (oneW, pulses, digital):
+			try: eval(data)
+			except: pass
+	result('config.eval', timeit.timeit(old, number=runs), runs, channels=channels)
+	result('config.parse', timeit.timeit(lambda: config.Config(oneW, pulses, digital), number=runs), runs, channels=channels)
+	with tempfile.TemporaryDirectory() as folder:
+		conf = fakeConf(folder, {'1w': oneW, 'pulses': pulses, 'digital': digital})
+		config.load(conf)
+		result('config.load.cached', timeit.timeit(lambda: config.load(conf), number=runs), runs, channels=channels)
+
+def configLookup(channels, runs):
+	oneW, pulses, digital = settings(channels)
+	pulselist = eval(pulses)
+	channelList = config.Config(oneW, pulses, digital).pulses
+	# the fields the pulse loop reads on every tick of every channel
+	def old():
+		for i in pulselist:
+			pulselist[i]['rate'], pulselist[i]['radius'], pulselist[i]['calibration'], pulselist[i]['linearSpeed'], pulselist[i]['distance'], pulselist[i]['revolutions'], pulselist[i]['revCounter']
+	def new():
+		for i in channelList:
+			channel = channelList[i]
+			channel.rate, channel.radius, channel.calibration, channel.linearSpeed, channel.distance, channel.revolutions, channel.revCounter
+	result('config.lookup.dict', timeit.timeit(old, number=runs), runs, channels=channels)
+	result('config.lookup.slots', timeit.timeit(new, number=runs), runs, channels=channels)
+
+def reader():
+	# a Process without __init__, only what the compute and serialization paths use
+	from . import openplotterGpioRead
+	process = openplotterGpioRead.Process.__new__(openplotterGpioRead.Process)
+	process.debug = False
+	process.ws = False
+	process.loop = None
+	process.metrics = metrics.registry()
+	process.templates = {}
+	process.instances = {}
+	process.writer = openplotterGpioRead.skWriter(process)
+	return openplotterGpioRead, process
+
+def pulseEdges(rates, runs):
+	R, process = reader()
+	for rate in rates:
+		# RPi.GPIO callback, it reads the clock itself so only the cost per call is measured
+		instance = R.rpmReader.__new__(R.rpmReader)
+		instance.initState(17, pulses_per_rev=2, reject=0)
+		seconds = timeit.timeit(lambda: instance.fell(0), number=runs)
+		result('rpmReader.fell', seconds, runs, rate=rate, cpu=round(seconds/runs*rate*100, 3))
+		# pigpio callback with ticks spaced at the pulse rate
+		instance = R.tickReader.__new__(R.tickReader)
+		instance.initState(pulses_per_rev=2, average=8, reject=0)
+		step = int(1e6/rate)
+		ticks = [(i*step) & 0xFFFFFFFF for i in range(runs)]
+		fell = instance.fell
+		start = time.perf_counter()
+		for tick in ticks: fell(17, 0, tick)
+		seconds = time.perf_counter() - start
+		result('tickReader.fell', seconds, runs, rate=rate, cpu=round(seconds/runs*rate*100, 3))
+
+class pulseInstance:
+	def __init__(self):
+		self.rpm = 1200.0
+		self.counter = 0
+		self.t = time.monotonic()
+
+def pulseTick(sizes, runs):
+	# one pass of the pulse loop over all channels that are due, values change every pass
+	R, process = reader()
+	for channels in sizes:
+		oneW, pulses, digital = settings(channels)
+		channelList = config.Config('{}', pulses, '{}').pulses
+		templates = {}
+		bands = {}
+		instances = {}
+		for i in channelList:
+			channel = channelList[i]
+			templates[i] = R.skTemplate('OpenPlotter.GPIO.pulses.'+i, [channel.linearSpeed, channel.distance, channel.revolutions, channel.revCounter])
+			bands[i] = R.deadbandSettings(channel)
+			instances[i] = pulseInstance()
+		def tick():
+			now = time.monotonic()
+			for i in channelList:
+				instance = instances[i]
+				instance.counter += 1
+				instance.rpm += 1
+				process.pulseValues(channelList[i], templates[i], bands[i], instance, now)
+			process.writer.pending = {}
+		result('Process.pulseValues', timeit.timeit(tick, number=runs), runs, channels=channels)
+
+def deltaBuild(sizes, runs):
+	# one frame with the values of every path, formatting the numbers included
+	R, process = reader()
+	for paths in sizes:
+		oneW, pulses, digital = settings((paths+3)//4)
+		channelList = config.Config('{}', pulses, '{}').pulses
+		sources = []
+		for i in channelList:
+			channel = channelList[i]
+			keys = [channel.linearSpeed, channel.distance, channel.revolutions, channel.revCounter][:paths-len(sources)*4]
+			sources.append(('OpenPlotter.GPIO.pulses.'+i, keys, R.skTemplate('OpenPlotter.GPIO.pulses.'+i, keys)))
+		values = [3.14159, 1234.5678, 20.0, 1234]
+		def old():
+			# the string building before the templates
+			updates = {}
+			for source, keys, template in sources:
+				for n in range(len(keys)):
+					if not source in updates: updates[source] = []
+					updates[source].append('{"path":"'+keys[n]+'","value":'+str(values[n])+'}')
+			SignalK = '{"updates":['
+			for source in updates: SignalK += '{"$source":"'+source+'","values":['+','.join(updates[source])+']},'
+			return SignalK[0:-1]+']}\n'
+		def new():
+			now = time.monotonic()
+			pending = {}
+			for source, keys, template in sources:
+				pending[template] = {}
+				for n in range(len(keys)): pending[template][keys[n]] = (repr(values[n]), now)
+			return process.writer.delta(pending)
+		result('delta.concatenation', timeit.timeit(old, number=runs), runs, paths=paths, bytes=len(old()))
+		result('skWriter.delta', timeit.timeit(new, number=runs), runs, paths=paths, bytes=len(new()))
+
+def subscribeParse(runs):
+	R, process = reader()
+	resets = []
+	process.resetCounter = lambda i: resets.append(i)
+	process.resetPaths = {'notifications.GPIO17.reset': '17'}
+	process.instances = {'17': {'instance': pulseInstance()}}
+	# what SK sends for the subscribed reset paths, a request to reset and an unrelated update
+	request = json.dumps({'context':'vessels.urn:mrn:signalk:uuid:00000000-0000-0000-0000-000000000000','updates':[{'source':{'label':'actions'},'$source':'actions','timestamp':'2022-01-01T00:00:00.000Z','values':[{'path':'notifications.GPIO17.reset','value':{'state':'normal','method':[],'message':'request'}}]}]})
+	other = json.dumps({'context':'vessels.urn:mrn:signalk:uuid:00000000-0000-0000-0000-000000000000','updates':[{'source':{'label':'other'},'$source':'other','timestamp':'2022-01-01T00:00:00.000Z','values':[{'path':'notifications.GPIO17.reset','value':{'state':'normal','method':[],'message':'done'}}]}]})
+	result('Process.reset.request', timeit.timeit(lambda: process.reset(request), number=runs), runs, bytes=len(request))
+	result('Process.reset.other', timeit.timeit(lambda: process.reset(other), number=runs), runs, bytes=len(other))
+	result('json.loads', timeit.timeit(lambda: json.loads(request), number=runs), runs, bytes=len(request))
+	result('ujson.loads', timeit.timeit(lambda: R.ujson.loads(request), number=runs), runs, bytes=len(request))
+
+class fakeWs:
+	def __init__(self):
+		self.frames = 0
+		self.bytes = 0
+	def send(self, frame):
+		self.frames += 1
+		self.bytes += len(frame)
+
+def notifyLatency(runs):
+	# from a digital change to the frame on the websocket, compared with forking a notification process
+	R, process = reader()
+	process.ws = fakeWs()
+	notification = {'state': 'alert', 'message': 'bilge pump on', 'visual': True, 'sound': True}
+	def put():
+		process.notify('OpenPlotter.GPIO.digital.5', 'notifications.GPIO5', notification['state'], notification['message'], notification['visual'], notification['sound'])
+		template, path, value, acquired = process.writer.notices.pop()
+		process.writer.send([process.writer.delta({template: {path: (value, acquired)}})])
+	# the writer also waits up to "window" seconds to coalesce, that is added to this
+	result('notify.websocket', timeit.timeit(put, number=runs*100), runs*100, window=process.writer.window)
+	# set-notification is a python script, starting an interpreter is the least it costs
+	command = [sys.executable, '-c', 'pass']
+	result('notify.subprocess.interpreter', timeit.timeit(lambda: process.setNotification(command), number=runs), runs)
+
+async def sourceFrames(R, process):
+	# before skWriter: every pulse channel sent its own frame when due, checked every 100 ms
+	pulselist = process.pulselist
+	instances = await process.loop.run_in_executor(None, process.pulseInstances, pulselist, {}, {})
+	ticks = {}
+	try:
+		while True:
+			await asyncio.sleep(0.1)
+			for i in instances:
+				now = time.monotonic()
+				if not i in ticks: ticks[i] = now
+				if now - ticks[i] <= pulselist[i].rate: continue
+				instance = instances[i]['instance']
+				values = ''
+				for path, value in R.pulseCompute(pulselist[i], instance.rpm, instance.counter, now - instance.t): values += '{"path":"'+path+'","value":'+str(value)+'},'
+				process.ws.send('{"updates":[{"$source":"OpenPlotter.GPIO.pulses.'+i+'","values":['+values[0:-1]+']}]}\n')
+				ticks[i] = now
+	finally:
+		for i in instances: instances[i]['instance'].cancel()
+
+async def writerFrames(R, process, design, pulselist, seconds):
+	process.loop = asyncio.get_running_loop()
+	process.changed = asyncio.Event()
+	process.connected = asyncio.Event()
+	process.connected.set()
+	process.pool = R.piPool()
+	process.recorder = None
+	process.samples = {}
+	process.counters = {}
+	process.counterStore = R.counterStore(os.devnull, 3600)
+	process.pulselist = pulselist
+	process.ws = fakeWs()
+	process.writer = R.skWriter(process)
+	if design == 'source': jobs = [asyncio.ensure_future(sourceFrames(R, process))]
+	else: jobs = [asyncio.ensure_future(process.pulse()), asyncio.ensure_future(process.writer.run())]
+	await asyncio.sleep(1.5)
+	frames = process.ws.frames
+	size = process.ws.bytes
+	start = time.monotonic()
+	await asyncio.sleep(seconds)
+	elapsed = time.monotonic() - start
+	frames = process.ws.frames - frames
+	size = process.ws.bytes - size
+	for job in jobs: job.cancel()
+	for job in jobs:
+		try: await job
+		except asyncio.CancelledError: pass
+	if design != 'source': process.writer.replaying.cancel()
+	return {'frames': round(frames/elapsed, 2), 'bytes': round(size/elapsed, 1)}
+
+def writerRates(channels, seconds):
+	# frames and bytes per second to SK from simulated pulse channels, one frame per source or coalesced by skWriter
+	R, process = reader()
+	from . import simulation
+	oneW, pulses, digital = settings(channels)
+	pulselist = config.Config('{}', pulses, '{}').pulses
+	scenario = {'seed': 0, 'latency': 0.0002, 'hosts': {}, 'pulses': {}, 'inputs': {}, 'w1': {'sensors': {}}}
+	for i in pulselist: scenario['pulses'][i] = {'rate': 20.0+int(i), 'jitter': 0.05}
+	simulation.install(R, scenario)
+	for design in ('source', 'writer'):
+		data = asyncio.run(writerFrames(R, process, design, pulselist, seconds))
+		print(json.dumps(dict(benchmark='sk.frames', design=design, channels=channels, seconds=seconds, **data), sort_keys=True))
+
+def threadStats():
+	# CPU seconds and context switches of the reader's threads, the simulated daemon is not counted
+	cpu = 0
+	switches = 0
+	for thread in threading.enumerate():
+		if thread.name.startswith('GPIO simulation'): continue
+		try:
+			with open('/proc/self/task/'+str(thread.native_id)+'/stat') as f: stat = f.read()
+			with open('/proc/self/task/'+str(thread.native_id)+'/status') as f: status = f.read()
+		except: continue
+		fields = stat[stat.rindex(')')+2:].split()
+		cpu += int(fields[11])+int(fields[12])
+		for line in status.splitlines():
+			if line.startswith('voluntary_ctxt_switches') or line.startswith('nonvoluntary_ctxt_switches'): switches += int(line.split()[1])
+	return cpu/os.sysconf('SC_CLK_TCK'), switches
+
+class modeConf:
+	def __init__(self, mode):
+		self.mode = mode
+	def get(self, section, key):
+		if key == 'digitalMode': return self.mode
+		return ''
+
+async def digitalIdle(R, process, simulation, mode, digital, seconds):
+	process.loop = asyncio.get_running_loop()
+	process.changed = asyncio.Event()
+	process.conf = modeConf(mode)
+	process.pool = R.piPool()
+	process.recorder = None
+	process.samples = {}
+	process.digitalList = config.Config('{}', '{}', digital).digital
+	task = asyncio.ensure_future(process.digital())
+	await asyncio.sleep(1)
+	daemon = simulation.daemon('idle')
+	requests = daemon.requests
+	cpu, switches = threadStats()
+	start = time.monotonic()
+	await asyncio.sleep(seconds)
+	elapsed = time.monotonic() - start
+	cpu2, switches2 = threadStats()
+	requests = daemon.requests - requests
+	task.cancel()
+	try: await task
+	except asyncio.CancelledError: pass
+	return {'cpu': round((cpu2-cpu)/elapsed*100, 3), 'wakeups': round((switches2-switches)/elapsed, 1), 'requests': round(requests/elapsed, 1)}
+
+def digitalModes(inputs, seconds, latency=0.0002):
+	# idle inputs on a simulated pigpiod of their own, cpu is % of one core, wakeups are context switches per second
+	R, process = reader()
+	from . import simulation
+	digital = {}
+	scenario = {'seed': 0, 'latency': latency, 'hosts': {}, 'pulses': {}, 'inputs': {}, 'w1': {'sensors': {}}}
+	for i in range(inputs):
+		key = 'idle-'+str(i+2)
+		digital[key] = {"mode":"in","pull": 'up', "init": False, "high":{"state":'alert',"message":'high',"visual":True,"sound":False},"low":{"state":'normal',"message":'low',"visual":False,"sound":False}}
+		scenario['inputs'][key] = {'period': 3600.0}
+	simulation.install(R, scenario)
+	for mode in ('poll', 'edge'):
+		data = asyncio.run(digitalIdle(R, process, simulation, mode, str(digital), seconds))
+		print(json.dumps(dict(benchmark='digital.idle', mode=mode, inputs=inputs, seconds=seconds, latency=latency, **data), sort_keys=True))
+
+class idleWs(fakeWs):
+	# an SK that never sends anything, recv blocks until the connection is shut down
+	def __init__(self):
+		fakeWs.__init__(self)
+		self.closed = threading.Event()
+	def recv(self):
+		self.closed.wait()
+		raise Exception('closed')
+	def shutdown(self):
+		self.closed.set()
+	def close(self):
+		self.closed.set()
+
+class threadedReader:
+	# the design before the asyncio core: four free running threads with their own sleeps and a supervisor
+	# polling them every 5 s, doing the same work on the same channels
+	def __init__(self, R, settings, ws):
+		self.R = R
+		self.settings = settings
+		self.ws = ws
+
+	def oneW(self):
+		oneWlist = self.settings.oneW
+		ticks = {}
+		while True:
+			time.sleep(0.1)
+			for sensor in self.R.W1ThermSensor.get_available_sensors():
+				sid = sensor.id
+				if sid in oneWlist and oneWlist[sid].sk:
+					value = str(oneWlist[sid].offset+sensor.get_temperature(self.R.Unit.KELVIN))
+					if not sid in ticks: ticks[sid] = time.time()
+					if time.time() - ticks[sid] > oneWlist[sid].rate:
+						self.ws.send('{"updates":[{"$source":"OpenPlotter.GPIO.1W.'+sid+'","values":[{"path":"'+oneWlist[sid].sk+'","value":'+value+'}]}]}\n')
+						ticks[sid] = time.time()
+
+	def pulse(self):
+		pulselist = self.settings.pulses
+		instances = {}
+		for i in pulselist: instances[i] = self.R.rpmReader(pulselist[i].gpio, pulses_per_rev=pulselist[i].pulsesPerRev, pull=pulselist[i].pull)
+		ticks = {}
+		while True:
+			time.sleep(0.1)
+			for i in pulselist:
+				if not i in ticks: ticks[i] = time.time()
+				values = ''
+				for path, value in self.R.pulseCompute(pulselist[i], instances[i].rpm, instances[i].counter, time.monotonic() - instances[i].t): values += '{"path":"'+path+'","value":'+str(value)+'},'
+				if time.time() - ticks[i] > pulselist[i].rate:
+					self.ws.send('{"updates":[{"$source":"OpenPlotter.GPIO.pulses.'+i+'","values":['+values[0:-1]+']}]}\n')
+					ticks[i] = time.time()
+
+	def subscribe(self):
+		while True:
+			time.sleep(0.01)
+			self.ws.recv()
+
+	def digital(self):
+		digitalList = self.settings.digital
+		instances = {}
+		for i in digitalList: instances[i] = {'pi': self.R.pigpio.pi(digitalList[i].host), 'gpio': digitalList[i].gpio, 'old': 'init'}
+		while True:
+			for i in instances:
+				level = instances[i]['pi'].read(instances[i]['gpio'])
+				if instances[i]['old'] != level: instances[i]['old'] = level
+			time.sleep(0.01)
+
+	def run(self):
+		threads = {}
+		while True:
+			for job in (self.oneW, self.pulse, self.subscribe, self.digital):
+				if not job.__name__ in threads or not threads[job.__name__].is_alive():
+					threads[job.__name__] = threading.Thread(target=job, daemon=True)
+					threads[job.__name__].start()
+			time.sleep(5)
+
+class readerConf:
+	def __init__(self, folder):
+		self.conf_folder = folder
+	def get(self, section, key):
+		return ''
+
+def readerStats(seconds):
+	# after the channels are up, the whole process but the simulated hardware
+	time.sleep(3)
+	cpu, switches = threadStats()
+	start = time.monotonic()
+	time.sleep(seconds)
+	elapsed = time.monotonic() - start
+	cpu2, switches2 = threadStats()
+	with open('/proc/self/status') as f: 
+		for line in f:
+			if line.startswith('VmRSS'): rss = int(line.split()[1])
+	return {'cpu': round((cpu2-cpu)/elapsed*100, 3), 'wakeups': round((switches2-switches)/elapsed, 1), 'rss': round(rss/1024.0, 1), 'threads': threading.active_count()}
+
+def readerDesign(design, channels, seconds):
+	# one design per process, so the RSS of one is not counted in the other
+	from . import openplotterGpioRead as R
+	from . import simulation
+	oneW, pulses, digital = settings(channels)
+	pulses = pulses.replace("'engine': 'pigpio'", "'engine': 'RPi.GPIO'") # the threaded design only had rpmReader
+	digital = digital.replace("'localhost-", "'inputs-") # the pins of the pulses are taken
+	data = config.Config(oneW, pulses, digital)
+	scenario = {'seed': 0, 'latency': 0.0002, 'hosts': {}, 'pulses': {}, 'inputs': {}, 'w1': {'sensors': {}}}
+	for i in data.pulses: scenario['pulses'][i] = {'rate': 20.0+int(i), 'jitter': 0.05}
+	for i in data.digital: scenario['inputs'][i] = {'period': 3600.0}
+	for i in data.oneW: scenario['w1']['sensors'][i] = {}
+	simulation.install(R, scenario)
+	ws = idleWs()
+	if design == 'threaded':
+		threading.Thread(target=threadedReader(R, data, ws).run, daemon=True).start()
+		stats = readerStats(seconds)
+	else:
+		with tempfile.TemporaryDirectory() as folder:
+			process = R.Process.__new__(R.Process)
+			process.ws = False
+			process.loop = None
+			process.instances = {}
+			process.templates = {}
+			process.conf = readerConf(folder)
+			process.debug = False
+			process.metrics = metrics.registry()
+			process.samples = {}
+			process.writer = R.skWriter(process)
+			process.counterStore = R.counterStore(folder+'/openplotter-gpio-counters.json')
+			process.counters = {}
+			process.receiver = R.concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='GPIO SK receiver')
+			process.pool = R.piPool()
+			process.recorder = None
+			process.outputs = {}
+			process.outputsLock = threading.Lock()
+			process.connect = lambda: setattr(process, 'ws', ws)
+			async def run():
+				task = asyncio.ensure_future(process.run(data))
+				stats = await asyncio.get_running_loop().run_in_executor(None, readerStats, seconds)
+				task.cancel()
+				try: await task
+				except asyncio.CancelledError: pass
+				return stats
+			stats = asyncio.run(run())
+	print(json.dumps(dict(benchmark='reader.idle', design=design, channels=channels*3, seconds=seconds, frames=round(ws.frames/(seconds+3), 2), **stats), sort_keys=True))
+
+def readerDesigns(channels, seconds):
+	# cpu is % of one core, wakeups are context switches per second, rss is MB, channels are 1W + pulses + digital
+	for design in ('threaded', 'asyncio'):
+		out = subprocess.run([sys.executable, '-m', 'openplotterGpio.benchmark', 'reader', design, str(channels), str(seconds)], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+		if out.returncode: print(json.dumps({'benchmark': 'reader.idle', 'design': design, 'error': out.stderr.decode().strip().split('\n')[-1]}, sort_keys=True))
+		else: sys.stdout.write(out.stdout.decode())
+
+def main():
+	if len(sys.argv) > 1 and sys.argv[1] == 'reader':
+		readerDesign(sys.argv[2], int(sys.argv[3]), float(sys.argv[4]))
+		return
+	channels = 8
+	if len(sys.argv) > 1: channels = int(sys.argv[1])
+	configLoad(channels, 2000)
+	configLookup(channels, 100000)
+	pulseEdges((10, 100, 1000, 10000), 100000)
+	pulseTick((1, 10, 50, 200), 200)
+	deltaBuild((1, 10, 100), 2000)
+	subscribeParse(20000)
+	notifyLatency(20)
+	# last, they swap the reader's hardware modules for the simulated ones
+	writerRates(20, 5)
+	digitalModes(12, 5)
+	readerDesigns(channels, 10)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+import ast, os, copy
+
+# GPIO/1w, GPIO/pulses and GPIO/digital are parsed and validated here once and shared by
+# the reader, actions, startup, used GPIOs and the GUI. Missing keys from older versions get
+# the same defaults the reader always used.
+
+class Channel:
+	__slots__ = ()
+	def __eq__(self, other):
+		# equal settings mean a running channel can be kept as it is on reload
+		if type(self) is not type(other): return False
+		for i in self.__slots__:
+			if getattr(self, i) != getattr(other, i): return False
+		return True
+
+class OneWChannel(Channel):
+	__slots__ = ('id', 'sk', 'rate', 'offset', 'resolution', 'deadband', 'relative', 'heartbeat')
+	def __init__(self, sid, data):
+		self.id = sid
+		self.sk = str(data['sk'])
+		self.rate = float(data['rate'])
+		if self.rate <= 0: raise ValueError('rate must be positive')
+		self.offset = float(data['offset'])
+		self.resolution = 0
+		if 'resolution' in data and data['resolution']: self.resolution = int(data['resolution'])
+		if self.resolution and not self.resolution in (9, 10, 11, 12): raise ValueError('resolution must be 9 to 12 bits')
+		readDeadband(self, data)
+
+class PulseChannel(Channel):
+	__slots__ = ('gpio', 'rate', 'pulsesPerRev', 'pull', 'revCounter', 'revolutions', 'linearSpeed', 'distance', 'radius', 'calibration', 'engine', 'average', 'mode', 'gate', 'reject', 'deadband', 'relative', 'heartbeat', 'enabled', 'resettable')
+	def __init__(self, gpio, data):
+		self.gpio = int(gpio)
+		self.rate = float(data['rate'])
+		if self.rate <= 0: raise ValueError('rate must be positive')
+		self.pulsesPerRev = int(data['pulsesPerRev'])
+		if self.pulsesPerRev <= 0: raise ValueError('pulses per revolution must be positive')
+		self.pull = data['pull']
+		self.revCounter = data['revCounter']
+		self.revolutions = data['revolutions']
+		self.linearSpeed = data['linearSpeed']
+		self.distance = data['distance']
+		self.radius = float(data['radius'] or 0)
+		self.calibration = float(data['calibration'])
+		self.engine = 'RPi.GPIO'
+		if 'engine' in data: self.engine = data['engine']
+		self.average = 1
+		if 'average' in data: self.average = max(1, int(data['average']))
+		self.mode = 'period'
+		if 'mode' in data: self.mode = data['mode']
+		if not self.mode in ('period', 'frequency'): raise ValueError('unknown mode '+str(self.mode))
+		self.gate = 1.0
+		if 'gate' in data: self.gate = float(data['gate'])
+		self.reject = 10.0
+		if 'reject' in data: self.reject = float(data['reject'])
+		readDeadband(self, data)
+		self.enabled = bool(self.revCounter or self.revolutions or self.linearSpeed or self.distance)
+		self.resettable = bool(self.revCounter or self.distance)
+
+class DigitalChannel(Channel):
+	__slots__ = ('id', 'host', 'gpio', 'mode', 'pull', 'init', 'high', 'low', 'filter', 'steady', 'active', 'hold', 'rate', 'group')
+	def __init__(self, key, data):
+		self.id = key
+		items = key.split('-')
+		self.host = items[0]
+		self.gpio = int(items[1])
+		self.mode = data['mode']
+		self.pull = ''
+		self.init = False
+		self.high = {}
+		self.low = {}
+		self.filter = 'none'
+		self.steady = 10000
+		self.active = 100000
+		self.hold = 0.0
+		self.rate = 0
+		self.group = ''
+		if self.mode == 'in':
+			self.pull = data['pull']
+			self.init = bool(data['init'])
+			self.high = data['high']
+			self.low = data['low']
+			# pigpio filters in microseconds, hold in seconds and rate in notifications per minute
+			if 'filter' in data: self.filter = data['filter']
+			if not self.filter in ('none', 'glitch', 'noise'): raise ValueError('unknown filter '+str(self.filter))
+			if 'steady' in data: self.steady = int(data['steady'])
+			if self.steady < 0 or self.steady > 300000: raise ValueError('steady must be 0 to 300000 us')
+			if 'active' in data: self.active = int(data['active'])
+			if self.active < 0 or self.active > 1000000: raise ValueError('active must be 0 to 1000000 us')
+			if 'hold' in data: self.hold = float(data['hold'])
+			if self.hold < 0: raise ValueError('hold must be positive')
+			if 'rate' in data: self.rate = int(data['rate'])
+			if self.rate < 0: raise ValueError('rate must be positive')
+		elif self.mode == 'out':
+			if 'group' in data: self.group = str(data['group'])
+		else: raise ValueError('unknown mode '+str(self.mode))
+
+def readDeadband(channel, data):
+	channel.deadband = 0.0
+	channel.relative = False
+	channel.heartbeat = 0.0
+	if 'deadband' in data: channel.deadband = float(data['deadband'])
+	if 'relative' in data: channel.relative = bool(data['relative'])
+	if 'heartbeat' in data: channel.heartbeat = float(data['heartbeat'])
+
+class Config:
+	def __init__(self, oneW, pulses, digital):
+		self.errors = []
+		self.raw = {}
+		self.oneW = self.parse('1w', oneW, OneWChannel)
+		self.pulses = self.parse('pulses', pulses, PulseChannel)
+		self.digital = self.parse('digital', digital, DigitalChannel)
+
+	def parse(self, key, data, channel):
+		# literal_eval only accepts python literals, these strings are written with str(dict)
+		try: items = ast.literal_eval(data)
+		except: items = {}
+		if not isinstance(items, dict):
+			self.errors.append('GPIO/'+key+' is not a dictionary')
+			items = {}
+		self.raw[key] = items
+		channels = {}
+		for i in items:
+			try: channels[i] = channel(i, items[i])
+			except Exception as e: self.errors.append('GPIO/'+key+' '+str(i)+': '+str(e))
+		return channels
+
+	def copy(self, key):
+		# the GUI edits and saves whole dictionaries, it gets its own copy so the cache stays intact
+		return copy.deepcopy(self.raw[key])
+
+cache = {}
+
+def load(conf):
+	try:
+		path = conf.conf_folder+'/openplotter.conf'
+		mtime = os.stat(path).st_mtime_ns
+	except:
+		path = ''
+		mtime = None
+	if mtime is not None and path in cache and cache[path][0] == mtime: return cache[path][1]
+	config = Config(conf.get('GPIO', '1w'), conf.get('GPIO', 'pulses'), conf.get('GPIO', 'digital'))
+	if mtime is not None: cache[path] = (mtime, config)
+	return config
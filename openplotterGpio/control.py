@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+# local control socket of openplotter-gpio-read, one JSON line per request and one per response
+
+import socket, ujson
+
+def socketPath(conf):
+	return conf.conf_folder+'/openplotter-gpio.sock'
+
+def request(conf, data, timeout=2.0):
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	sock.settimeout(timeout)
+	try:
+		sock.connect(socketPath(conf))
+		sock.sendall((ujson.dumps(data)+'\n').encode())
+		response = b''
+		while not response.endswith(b'\n'):
+			chunk = sock.recv(4096)
+			if not chunk: break
+			response += chunk
+	finally: sock.close()
+	response = ujson.loads(response)
+	if 'error' in response: raise Exception(response['error'])
+	return response['result']
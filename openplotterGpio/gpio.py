@@ -18,6 +18,7 @@
 import subprocess, sys, ujson
 from openplotterSettings import gpio
 from openplotterSettings import platform
+from . import config
 
 class Gpio:
 	def __init__(self,conf):
@@ -66,12 +67,12 @@ class Gpio:
 		else:
 			gpioBCM = '4'
 			pin = '7'
-			config = '/boot/config.txt'
+			bootConfig = '/boot/config.txt'
 			try: 
-				file = open(config, 'r')
+				file = open(bootConfig, 'r')
 			except:
-				config = '/boot/firmware/config.txt'
-				file = open(config, 'r')
+				bootConfig = '/boot/firmware/config.txt'
+				file = open(bootConfig, 'r')
 			while True:
 				line = file.readline()
 				if not line: break
@@ -91,9 +92,8 @@ class Gpio:
 					self.used.append({'app':'GPIO', 'id':'1W', 'physical':pin})
 
 		#pulses
-		data = self.conf.get('GPIO', 'pulses')
-		try: pulselist = eval(data)
-		except: pulselist = {}
+		settings = config.load(self.conf)
+		pulselist = settings.pulses
 		for i in pulselist:
 			gpioBCM = 'GPIO '+i
 			for ii in self.gpioMap:
@@ -104,21 +104,18 @@ class Gpio:
 					self.used.append({'app':'GPIO', 'id':'pulses', 'physical':pin})
 
 		#digital
-		data = self.conf.get('GPIO', 'digital')
-		try: digitalList = eval(data)
-		except: digitalList = {}
+		digitalList = settings.digital
 		for i in digitalList:
-			items = i.split('-')
-			if items[0] == 'localhost':
-				gpioBCM = 'GPIO '+items[1]
+			if digitalList[i].host == 'localhost':
+				gpioBCM = 'GPIO '+str(digitalList[i].gpio)
 				for ii in self.gpioMap:
 					if gpioBCM == ii['BCM']:
 						pin = ii['physical']
-						if digitalList[i]['mode'] == 'in':
+						if digitalList[i].mode == 'in':
 							ground = True
 							power3 = True
 							self.used.append({'app':'GPIO', 'id':'digital input', 'physical':pin})
-						elif digitalList[i]['mode'] == 'out':
+						elif digitalList[i].mode == 'out':
 							ground = True
 							self.used.append({'app':'GPIO', 'id':'digital output', 'physical':pin})
 		#common
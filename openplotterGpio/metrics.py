@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+# counters, gauges and histograms of openplotter-gpio-read in the Prometheus text format,
+# written to GPIO/metricsFile and returned by the "metrics" command of the control socket
+
+import threading, os, bisect
+
+prefix = 'openplotter_gpio_'
+buckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0) # seconds
+
+def key(name, labels):
+	return (name, tuple(sorted(labels.items())))
+
+def series(name, labels, extra=()):
+	labels = tuple(labels)+tuple(extra)
+	if not labels: return prefix+name
+	items = []
+	for label, value in labels:
+		value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+		items.append(label+'="'+value+'"')
+	return prefix+name+'{'+','.join(items)+'}'
+
+def number(value):
+	if isinstance(value, float): return repr(round(value, 6))
+	return str(value)
+
+class registry:
+	def __init__(self):
+		# producers live in the loop and in executor threads
+		self.lock = threading.Lock()
+		self.counters = {}
+		self.gauges = {}
+		self.histograms = {}
+		self.tick = os.sysconf('SC_CLK_TCK')
+
+	def inc(self, name, value=1, **labels):
+		k = key(name, labels)
+		with self.lock: self.counters[k] = self.counters.get(k, 0) + value
+
+	def set(self, name, value, **labels):
+		k = key(name, labels)
+		with self.lock: self.gauges[k] = value
+
+	def clear(self, name):
+		with self.lock:
+			for k in list(self.gauges):
+				if k[0] == name: del self.gauges[k]
+
+	def observe(self, name, seconds, **labels):
+		k = key(name, labels)
+		with self.lock:
+			if not k in self.histograms: self.histograms[k] = [[0]*(len(buckets)+1), 0.0, 0]
+			histogram = self.histograms[k]
+			histogram[0][bisect.bisect_left(buckets, seconds)] += 1
+			histogram[1] += seconds
+			histogram[2] += 1
+
+	def threads(self):
+		# utime and stime of every thread of this process, in seconds
+		for thread in threading.enumerate():
+			try:
+				with open('/proc/self/task/'+str(thread.native_id)+'/stat') as f: stat = f.read()
+			except: continue # finished meanwhile
+			fields = stat[stat.rindex(')')+2:].split()
+			k = key('thread_cpu_seconds_total', {'thread': thread.name})
+			with self.lock: self.counters[k] = (int(fields[11])+int(fields[12]))/self.tick
+
+	def text(self):
+		self.threads()
+		with self.lock:
+			counters = dict(self.counters)
+			gauges = dict(self.gauges)
+			histograms = {}
+			for k in self.histograms: histograms[k] = [list(self.histograms[k][0]), self.histograms[k][1], self.histograms[k][2]]
+		lines = []
+		for kind, values in (('counter', counters), ('gauge', gauges)):
+			typed = set()
+			for name, labels in sorted(values):
+				if not name in typed:
+					typed.add(name)
+					lines.append('# TYPE '+prefix+name+' '+kind)
+				lines.append(series(name, labels)+' '+number(values[(name, labels)]))
+		typed = set()
+		for name, labels in sorted(histograms):
+			if not name in typed:
+				typed.add(name)
+				lines.append('# TYPE '+prefix+name+' histogram')
+			counts, total, count = histograms[(name, labels)]
+			cumulative = 0
+			for i in range(len(buckets)):
+				cumulative += counts[i]
+				lines.append(series(name+'_bucket', labels, [('le', buckets[i])])+' '+str(cumulative))
+			lines.append(series(name+'_bucket', labels, [('le', '+Inf')])+' '+str(count))
+			lines.append(series(name+'_sum', labels)+' '+number(total))
+			lines.append(series(name+'_count', labels)+' '+str(count))
+		return '\n'.join(lines)+'\n'
+
+def write(path, text):
+	# atomic, a scraper never sees half a file
+	tmp = path+'.tmp'
+	with open(tmp, 'w') as f: f.write(text)
+	os.replace(tmp, path)
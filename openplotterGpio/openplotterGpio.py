@@ -25,6 +25,7 @@ from openplotterSignalkInstaller import connections
 try: from w1thermsensor import W1ThermSensor
 except: pass
 from .version import version
+from . import config
 
 class MyFrame(wx.Frame):
 	def __init__(self):
@@ -163,6 +164,10 @@ class MyFrame(wx.Frame):
 	def stopGpioRead(self):
 		subprocess.call(['pkill', '-f', 'openplotter-gpio-read'])
 
+	def reloadGpioRead(self):
+		# the reader applies the new settings itself and keeps unchanged channels running, onRefresh starts it if it is not running
+		subprocess.call(['pkill', '-HUP', '-f', 'openplotter-gpio-read'])
+
 	def onRefresh(self, e=0):
 		self.ShowStatusBarBLACK(' ')
 
@@ -298,9 +303,15 @@ class MyFrame(wx.Frame):
 			messageL = dlg.messageL.GetValue()
 			visualL = dlg.visualL.GetValue()
 			soundL = dlg.soundL.GetValue()
-			self.gpioDigital[index] = {"mode":"in","pull": pull, "init": init, "high":{"state":stateH,"message":messageH,"visual":visualH,"sound":soundH},"low":{"state":stateL,"message":messageL,"visual":visualL,"sound":soundL}}
+			filters = ['none','glitch','noise']
+			debounce = filters[dlg.filter.GetSelection()]
+			steady = int(dlg.steady.GetValue())
+			active = int(dlg.active.GetValue())
+			hold = float(dlg.hold.GetValue())
+			rate = int(dlg.rate.GetValue())
+			self.gpioDigital[index] = {"mode":"in","pull": pull, "init": init, "high":{"state":stateH,"message":messageH,"visual":visualH,"sound":soundH},"low":{"state":stateL,"message":messageL,"visual":visualL,"sound":soundL},"filter":debounce,"steady":steady,"active":active,"hold":hold,"rate":rate}
 			self.conf.set('GPIO', 'digital', str(self.gpioDigital))
-			self.stopGpioRead()
+			self.reloadGpioRead()
 			self.onRefresh()
 		dlg.Destroy()
 
@@ -316,8 +327,10 @@ class MyFrame(wx.Frame):
 				oldIndex = edit['host']+'-'+edit['gpio']
 				if oldIndex != index: del self.gpioDigital[oldIndex]
 			self.gpioDigital[index] = {"mode":"out"}
+			group = dlg.group.GetValue()
+			if group: self.gpioDigital[index]['group'] = group
 			self.conf.set('GPIO', 'digital', str(self.gpioDigital))
-			self.stopGpioRead()
+			self.reloadGpioRead()
 			self.onRefresh()
 			self.ShowStatusBarBLACK(_('You can turn GPIO outputs high or low using "Actions" in the Notifications app'))
 		dlg.Destroy()
@@ -330,15 +343,13 @@ class MyFrame(wx.Frame):
 		index = host+'-'+gpio
 		del self.gpioDigital[index]
 		self.conf.set('GPIO', 'digital', str(self.gpioDigital))
-		self.stopGpioRead()
+		self.reloadGpioRead()
 		self.onRefresh()
 
 	def readDigital(self):
 		self.listDigital.DeleteAllItems()
 		self.onListDigitalDeselected()
-		data = self.conf.get('GPIO', 'digital')
-		try: self.gpioDigital = eval(data)
-		except: self.gpioDigital = {}
+		self.gpioDigital = config.load(self.conf).copy('digital')
 		if self.gpioDigital:
 			for i in self.gpioDigital:
 				items = i.split('-')
@@ -350,7 +361,10 @@ class MyFrame(wx.Frame):
 					high = str(self.gpioDigital[i]['high'])
 					low = str(self.gpioDigital[i]['low'])
 					self.listDigital.Append([host, gpio, _('input'), high, low, init])
-				elif self.gpioDigital[i]['mode'] == 'out': self.listDigital.Append([host, gpio, _('output'), '', '', ''])
+				elif self.gpioDigital[i]['mode'] == 'out': 
+					group = ''
+					if 'group' in self.gpioDigital[i] and self.gpioDigital[i]['group']: group = _('Group')+': '+self.gpioDigital[i]['group']
+					self.listDigital.Append([host, gpio, _('output'), group, '', ''])
 				self.listDigital.SetItemBackgroundColour(self.listDigital.GetItemCount()-1,(255,220,100))
 
 	###########################################################################
@@ -400,6 +414,22 @@ class MyFrame(wx.Frame):
 		if selected == -1: return
 		gpio = self.listPulses.GetItemText(selected, 0)
 		edit = {"gpio": gpio, "rate": self.gpioPulses[gpio]['rate'],"pulsesPerRev": self.gpioPulses[gpio]['pulsesPerRev'],"pull": self.gpioPulses[gpio]['pull'], "counterSK": self.gpioPulses[gpio]['revCounter'], "revolutionsSK": self.gpioPulses[gpio]['revolutions'], "radius": self.gpioPulses[gpio]['radius'], "calibration": self.gpioPulses[gpio]['calibration'], "speedSK": self.gpioPulses[gpio]['linearSpeed'], "distanceSK": self.gpioPulses[gpio]['distance']}
+		if 'engine' in self.gpioPulses[gpio]: edit['engine'] = self.gpioPulses[gpio]['engine']
+		else: edit['engine'] = 'RPi.GPIO'
+		if 'average' in self.gpioPulses[gpio]: edit['average'] = self.gpioPulses[gpio]['average']
+		else: edit['average'] = 1
+		if 'mode' in self.gpioPulses[gpio]: edit['mode'] = self.gpioPulses[gpio]['mode']
+		else: edit['mode'] = 'period'
+		if 'gate' in self.gpioPulses[gpio]: edit['gate'] = self.gpioPulses[gpio]['gate']
+		else: edit['gate'] = 1.0
+		if 'reject' in self.gpioPulses[gpio]: edit['reject'] = self.gpioPulses[gpio]['reject']
+		else: edit['reject'] = 10.0
+		if 'deadband' in self.gpioPulses[gpio]: edit['deadband'] = self.gpioPulses[gpio]['deadband']
+		else: edit['deadband'] = 0.0
+		if 'relative' in self.gpioPulses[gpio]: edit['relative'] = self.gpioPulses[gpio]['relative']
+		else: edit['relative'] = False
+		if 'heartbeat' in self.gpioPulses[gpio]: edit['heartbeat'] = self.gpioPulses[gpio]['heartbeat']
+		else: edit['heartbeat'] = 0.0
 		self.setPulses(edit)
 
 	def setPulses(self,edit):
@@ -420,9 +450,17 @@ class MyFrame(wx.Frame):
 			calibration = float(dlg.calibration.GetValue())
 			linearSpeed = str(dlg.speedSK.GetValue())
 			distance = str(dlg.distanceSK.GetValue())
-			self.gpioPulses[gpio] = {"rate": rate, "pulsesPerRev": pulsesPerRev, "pull": pull, "revCounter": revCounter, "revolutions": revolutions, "radius": radius, "calibration": calibration, "linearSpeed": linearSpeed, "distance": distance}
+			engine = str(dlg.engine.GetValue())
+			average = int(dlg.average.GetValue())
+			mode = str(dlg.mode.GetValue())
+			gate = float(dlg.gate.GetValue())
+			reject = float(dlg.reject.GetValue())
+			deadband = float(dlg.deadband.GetValue())
+			relative = dlg.relative.GetSelection() == 1
+			heartbeat = float(dlg.heartbeat.GetValue())
+			self.gpioPulses[gpio] = {"rate": rate, "pulsesPerRev": pulsesPerRev, "pull": pull, "revCounter": revCounter, "revolutions": revolutions, "radius": radius, "calibration": calibration, "linearSpeed": linearSpeed, "distance": distance, "engine": engine, "average": average, "mode": mode, "gate": gate, "reject": reject, "deadband": deadband, "relative": relative, "heartbeat": heartbeat}
 			self.conf.set('GPIO', 'pulses', str(self.gpioPulses))
-			self.stopGpioRead()
+			self.reloadGpioRead()
 			self.onRefresh()
 		dlg.Destroy()
 
@@ -432,15 +470,13 @@ class MyFrame(wx.Frame):
 		gpio = self.listPulses.GetItemText(selected, 0)
 		del self.gpioPulses[gpio]
 		self.conf.set('GPIO', 'pulses', str(self.gpioPulses))
-		self.stopGpioRead()
+		self.reloadGpioRead()
 		self.onRefresh()
 
 	def readPulses(self):
 		self.listPulses.DeleteAllItems()
 		self.onListlistPulsesDeselected()
-		data = self.conf.get('GPIO', 'pulses')
-		try: self.gpioPulses = eval(data)
-		except: self.gpioPulses = {}
+		self.gpioPulses = config.load(self.conf).copy('pulses')
 		if self.gpioPulses:
 			for i in self.gpioPulses:
 				self.listPulses.Append([i, self.gpioPulses[i]['revolutions'], self.gpioPulses[i]['revCounter'], self.gpioPulses[i]['linearSpeed'], self.gpioPulses[i]['distance']])
@@ -457,6 +493,7 @@ class MyFrame(wx.Frame):
 			self.listOneW.InsertColumn(2, _('Signal K key'), width=370)
 			self.listOneW.InsertColumn(3, _('Rate'), width=75)
 			self.listOneW.InsertColumn(4, _('Offset'), width=75)
+			self.listOneW.InsertColumn(5, _('Resolution'), width=90)
 			self.listOneW.Bind(wx.EVT_LIST_ITEM_SELECTED, self.onListlistOneWSelected)
 			self.listOneW.Bind(wx.EVT_LIST_ITEM_DESELECTED, self.onListlistOneWDeselected)
 			self.listOneW.SetTextColour(wx.BLACK)
@@ -567,7 +604,12 @@ class MyFrame(wx.Frame):
 		sk = self.listOneW.GetItemText(selected, 2)
 		rate = self.listOneW.GetItemText(selected, 3)
 		offset = self.listOneW.GetItemText(selected, 4)
-		dlg = edit1W(sid,sk,rate,offset)
+		resolution = self.listOneW.GetItemText(selected, 5)
+		band = {'deadband': 0.0, 'relative': False, 'heartbeat': 0.0}
+		if sid in self.oneWlist:
+			for i in band:
+				if i in self.oneWlist[sid]: band[i] = self.oneWlist[sid][i]
+		dlg = edit1W(sid,sk,rate,offset,resolution,band)
 		res = dlg.ShowModal()
 		if res == wx.ID_OK:
 			sk = str(dlg.SKkey.GetValue())
@@ -575,10 +617,17 @@ class MyFrame(wx.Frame):
 			if not rate: rate = 1.0
 			offset = dlg.offset.GetValue()
 			if not offset: offset = 0.0
+			try: resolution = int(dlg.resolution.GetValue())
+			except: resolution = 0
+			try: deadband = float(dlg.deadband.GetValue())
+			except: deadband = 0.0
+			relative = dlg.relative.GetSelection() == 1
+			try: heartbeat = float(dlg.heartbeat.GetValue())
+			except: heartbeat = 0.0
 			if not sk: del self.oneWlist[sid]
-			else: self.oneWlist[sid] = {'sk':sk,'rate':float(rate),'offset':float(offset)}
+			else: self.oneWlist[sid] = {'sk':sk,'rate':float(rate),'offset':float(offset),'resolution':resolution,'deadband':deadband,'relative':relative,'heartbeat':heartbeat}
 			self.conf.set('GPIO', '1w', str(self.oneWlist))
-			self.stopGpioRead()
+			self.reloadGpioRead()
 			self.onRefresh()
 		dlg.Destroy()
 
@@ -588,20 +637,18 @@ class MyFrame(wx.Frame):
 		sid = self.listOneW.GetItemText(selected, 1)
 		del self.oneWlist[sid]
 		self.conf.set('GPIO', '1w', str(self.oneWlist))
-		self.stopGpioRead()
+		self.reloadGpioRead()
 		self.onRefresh()
 
 	def readOneW(self):
 		self.listOneW.DeleteAllItems()
 		self.onListlistOneWDeselected()
-		data = self.conf.get('GPIO', '1w')
-		try: self.oneWlist = eval(data)
-		except: self.oneWlist = {}
+		self.oneWlist = config.load(self.conf).copy('1w')
 		try: out = subprocess.check_output('ls /sys/bus/w1/', shell=True).decode(sys.stdin.encoding)
 		except:
 			if self.oneWlist:
 				for i in self.oneWlist:
-					self.listOneW.Append(['',i,self.oneWlist[i]['sk'],self.oneWlist[i]['rate'],self.oneWlist[i]['offset']])
+					self.listOneW.Append(['',i,self.oneWlist[i]['sk'],self.oneWlist[i]['rate'],self.oneWlist[i]['offset'],self.oneWResolution(i)])
 					self.listOneW.SetItemBackgroundColour(self.listOneW.GetItemCount()-1,(255,0,0))
 		else: 
 			for sensor in W1ThermSensor.get_available_sensors():
@@ -609,13 +656,15 @@ class MyFrame(wx.Frame):
 					sk = self.oneWlist[sensor.id]['sk']
 					rate = self.oneWlist[sensor.id]['rate']
 					offset = self.oneWlist[sensor.id]['offset']
-					self.listOneW.Append([sensor.type.name,sensor.id,sk,rate,offset])
+					resolution = self.oneWResolution(sensor.id)
+					self.listOneW.Append([sensor.type.name,sensor.id,sk,rate,offset,resolution])
 					self.listOneW.SetItemBackgroundColour(self.listOneW.GetItemCount()-1,(255,220,100))
 				else:
 					sk = ''
 					rate = ''
 					offset = ''
-					self.listOneW.Append([sensor.type.name,sensor.id,sk,rate,offset])
+					resolution = ''
+					self.listOneW.Append([sensor.type.name,sensor.id,sk,rate,offset,resolution])
 			if self.oneWlist:
 				for i in self.oneWlist:
 					exist = False
@@ -624,9 +673,13 @@ class MyFrame(wx.Frame):
 							exist = True
 							break
 					if not exist:
-						self.listOneW.Append(['',i,self.oneWlist[i]['sk'],self.oneWlist[i]['rate'],self.oneWlist[i]['offset']])
+						self.listOneW.Append(['',i,self.oneWlist[i]['sk'],self.oneWlist[i]['rate'],self.oneWlist[i]['offset'],self.oneWResolution(i)])
 						self.listOneW.SetItemBackgroundColour(self.listOneW.GetItemCount()-1,(255,0,0))
 
+	def oneWResolution(self,sid):
+		if 'resolution' in self.oneWlist[sid] and self.oneWlist[sid]['resolution']: return str(self.oneWlist[sid]['resolution'])
+		return _('default')
+
 	###########################################################################
 
 	def pageSeatalk(self):
@@ -826,11 +879,11 @@ class addSeatalkConn(wx.Dialog):
 
 class edit1W(wx.Dialog):
 
-	def __init__(self,sid,sk,rate,offset):
+	def __init__(self,sid,sk,rate,offset,resolution,band):
 		self.platform = platform.Platform()
 		title = _('Editing sensor ')+sid
 
-		wx.Dialog.__init__(self, None, title=title, size=(450, 180))
+		wx.Dialog.__init__(self, None, title=title, size=(450, 260))
 		self.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
 		panel = wx.Panel(self)
 
@@ -845,7 +898,7 @@ class edit1W(wx.Dialog):
 			self.SKkey.Disable()
 			self.edit_skkey.Disable()
 
-		self.rate_list = ['1.0', '5.0', '30.0', '60.0', '300.0']
+		self.rate_list = ['0.2', '0.5', '1.0', '5.0', '30.0', '60.0', '300.0']
 		self.rate_label = wx.StaticText(panel, label=_('Rate (seconds)'))
 		self.rate = wx.ComboBox(panel, choices=self.rate_list, style=wx.CB_READONLY)
 		self.rate.SetValue(rate)
@@ -854,6 +907,22 @@ class edit1W(wx.Dialog):
 		self.offset = wx.TextCtrl(panel)
 		self.offset.SetValue(offset)
 
+		self.resolution_label = wx.StaticText(panel, label=_('Resolution (bits)'))
+		self.resolution = wx.ComboBox(panel, choices=[_('default'), '9', '10', '11', '12'], style=wx.CB_READONLY)
+		if resolution: self.resolution.SetValue(resolution)
+		else: self.resolution.SetValue(_('default'))
+		self.resolution_help = wx.StaticText(panel, label=_('9 bits: ~94 ms, 12 bits: ~750 ms'))
+
+		self.deadband_label = wx.StaticText(panel, label=_('Deadband'))
+		self.deadband = wx.TextCtrl(panel)
+		self.deadband.SetValue(str(band['deadband']))
+		self.relative = wx.ComboBox(panel, choices=[_('absolute'), _('relative (%)')], style=wx.CB_READONLY)
+		if band['relative']: self.relative.SetSelection(1)
+		else: self.relative.SetSelection(0)
+		self.heartbeat_label = wx.StaticText(panel, label=_('Heartbeat (seconds)'))
+		self.heartbeat = wx.TextCtrl(panel)
+		self.heartbeat.SetValue(str(band['heartbeat']))
+
 		cancelBtn = wx.Button(panel, wx.ID_CANCEL)
 		okBtn = wx.Button(panel, wx.ID_OK)
 
@@ -867,6 +936,18 @@ class edit1W(wx.Dialog):
 		vbox1.Add(self.offset_label, 0, wx.ALL| wx.EXPAND, 5)
 		vbox1.Add(self.offset, 1, wx.ALL | wx.EXPAND, 5)
 
+		vbox2 = wx.BoxSizer(wx.HORIZONTAL)
+		vbox2.Add(self.resolution_label, 0, wx.ALL | wx.EXPAND, 5)
+		vbox2.Add(self.resolution, 0, wx.ALL| wx.EXPAND, 5)
+		vbox2.Add(self.resolution_help, 0, wx.ALL| wx.EXPAND, 5)
+
+		vbox3 = wx.BoxSizer(wx.HORIZONTAL)
+		vbox3.Add(self.deadband_label, 0, wx.ALL | wx.EXPAND, 5)
+		vbox3.Add(self.deadband, 1, wx.ALL| wx.EXPAND, 5)
+		vbox3.Add(self.relative, 0, wx.ALL| wx.EXPAND, 5)
+		vbox3.Add(self.heartbeat_label, 0, wx.ALL| wx.EXPAND, 5)
+		vbox3.Add(self.heartbeat, 1, wx.ALL| wx.EXPAND, 5)
+
 		hbox = wx.BoxSizer(wx.HORIZONTAL)
 		hbox.AddStretchSpacer(1)
 		hbox.Add(cancelBtn, 0, wx.EXPAND, 0)
@@ -879,6 +960,8 @@ class edit1W(wx.Dialog):
 		vbox.Add(hbox2, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
 		vbox.AddSpacer(5)
 		vbox.Add(vbox1, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
+		vbox.Add(vbox2, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
+		vbox.Add(vbox3, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
 		vbox.AddStretchSpacer(1)
 		vbox.Add(hbox, 0, wx.ALL | wx.EXPAND, 10)
 
@@ -903,7 +986,7 @@ class editPulses(wx.Dialog):
 		if edit: title = _('Editing GPIO pulses')
 		else: title = _('Adding GPIO pulses')
 
-		wx.Dialog.__init__(self, None, title=title, size=(800, 420))
+		wx.Dialog.__init__(self, None, title=title, size=(800, 600))
 		self.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
 		panel = wx.Panel(self)
 
@@ -927,6 +1010,45 @@ class editPulses(wx.Dialog):
 		if edit: self.pull.SetValue(edit['pull'])
 		else: self.pull.SetValue('down')
 
+		engineLabel= wx.StaticText(panel, label = _('Timing'))
+		self.engine = wx.ComboBox(panel, choices = ['pigpio','RPi.GPIO'], style=wx.CB_READONLY)
+		if edit: self.engine.SetValue(edit['engine'])
+		else: self.engine.SetValue('pigpio')
+
+		averageLabel = wx.StaticText(panel, label=_('Average (pulses)'))
+		self.average = wx.TextCtrl(panel)
+		if edit: self.average.SetValue(str(edit['average']))
+		else: self.average.SetValue('1')
+
+		modeLabel= wx.StaticText(panel, label = _('Mode'))
+		self.mode = wx.ComboBox(panel, choices = ['period','frequency'], style=wx.CB_READONLY)
+		self.mode.Bind(wx.EVT_COMBOBOX, self.onMode)
+		if edit: self.mode.SetValue(edit['mode'])
+		else: self.mode.SetValue('period')
+
+		gateLabel = wx.StaticText(panel, label=_('Gate (seconds)'))
+		self.gate = wx.TextCtrl(panel)
+		if edit: self.gate.SetValue(str(edit['gate']))
+		else: self.gate.SetValue('1.0')
+
+		rejectLabel = wx.StaticText(panel, label=_('Reject pulses shorter than (ms)'))
+		self.reject = wx.TextCtrl(panel)
+		if edit: self.reject.SetValue(str(edit['reject']))
+		else: self.reject.SetValue('10.0')
+
+		deadbandLabel = wx.StaticText(panel, label=_('Deadband'))
+		self.deadband = wx.TextCtrl(panel)
+		if edit: self.deadband.SetValue(str(edit['deadband']))
+		else: self.deadband.SetValue('0.0')
+		self.relative = wx.ComboBox(panel, choices=[_('absolute'), _('relative (%)')], style=wx.CB_READONLY)
+		if edit and edit['relative']: self.relative.SetSelection(1)
+		else: self.relative.SetSelection(0)
+
+		heartbeatLabel = wx.StaticText(panel, label=_('Heartbeat (seconds)'))
+		self.heartbeat = wx.TextCtrl(panel)
+		if edit: self.heartbeat.SetValue(str(edit['heartbeat']))
+		else: self.heartbeat.SetValue('0.0')
+
 		vline1 = wx.StaticLine(panel)
 
 		revolutionsSKLabel = wx.StaticText(panel, label=_('Revolutions (Hz)'))
@@ -984,6 +1106,31 @@ class editPulses(wx.Dialog):
 		column1h3.Add(pullLabel, 0, wx.ALL | wx.EXPAND, 5)
 		column1h3.Add(self.pull, 0, wx.ALL | wx.EXPAND, 5)
 
+		column1h4 = wx.BoxSizer(wx.HORIZONTAL)
+		column1h4.Add(engineLabel, 0, wx.ALL | wx.EXPAND, 5)
+		column1h4.Add(self.engine, 0, wx.ALL | wx.EXPAND, 5)
+		column1h4.Add(averageLabel, 0, wx.ALL | wx.EXPAND, 5)
+		column1h4.Add(self.average, 0, wx.ALL | wx.EXPAND, 5)
+
+		column1h5 = wx.BoxSizer(wx.HORIZONTAL)
+		column1h5.Add(modeLabel, 0, wx.ALL | wx.EXPAND, 5)
+		column1h5.Add(self.mode, 0, wx.ALL | wx.EXPAND, 5)
+		column1h5.Add(gateLabel, 0, wx.ALL | wx.EXPAND, 5)
+		column1h5.Add(self.gate, 0, wx.ALL | wx.EXPAND, 5)
+
+		column1h6 = wx.BoxSizer(wx.HORIZONTAL)
+		column1h6.Add(rejectLabel, 0, wx.ALL | wx.EXPAND, 5)
+		column1h6.Add(self.reject, 0, wx.ALL | wx.EXPAND, 5)
+
+		column3h4 = wx.BoxSizer(wx.HORIZONTAL)
+		column3h4.Add(deadbandLabel, 0, wx.ALL | wx.EXPAND, 5)
+		column3h4.Add(self.deadband, 0, wx.ALL | wx.EXPAND, 5)
+		column3h4.Add(self.relative, 0, wx.ALL | wx.EXPAND, 5)
+
+		column3h5 = wx.BoxSizer(wx.HORIZONTAL)
+		column3h5.Add(heartbeatLabel, 0, wx.ALL | wx.EXPAND, 5)
+		column3h5.Add(self.heartbeat, 0, wx.ALL | wx.EXPAND, 5)
+
 		column2h0 = wx.BoxSizer(wx.HORIZONTAL)
 		column2h0.Add(self.revolutionsSK, 1, wx.ALL | wx.EXPAND, 5)
 		column2h0.Add(revolutionsSKedit, 0, wx.ALL | wx.EXPAND, 5)
@@ -1012,6 +1159,9 @@ class editPulses(wx.Dialog):
 		column1.Add(column1h0, 0, wx.ALL | wx.EXPAND, 5)
 		column1.Add(column1h3, 0, wx.ALL | wx.EXPAND, 5)
 		column1.Add(column1h2, 0, wx.ALL | wx.EXPAND, 5)
+		column1.Add(column1h5, 0, wx.ALL | wx.EXPAND, 5)
+		column1.Add(column1h4, 0, wx.ALL | wx.EXPAND, 5)
+		column1.Add(column1h6, 0, wx.ALL | wx.EXPAND, 5)
 		column1.Add(revolutionsSKLabel, 0, wx.LEFT | wx.EXPAND, 10)
 		column1.Add(column2h0, 0, wx.ALL | wx.EXPAND, 5)
 		column1.AddSpacer(5)
@@ -1030,6 +1180,9 @@ class editPulses(wx.Dialog):
 		column3.AddSpacer(5)
 		column3.Add(distanceSKLabel, 0, wx.LEFT | wx.EXPAND, 10)
 		column3.Add(column3h2, 0, wx.ALL | wx.EXPAND, 5)
+		column3.AddSpacer(5)
+		column3.Add(column3h4, 0, wx.ALL | wx.EXPAND, 5)
+		column3.Add(column3h5, 0, wx.ALL | wx.EXPAND, 5)
 
 		hbox = wx.BoxSizer(wx.HORIZONTAL)
 		hbox.Add(column1, 1, wx.LEFT | wx.RIGHT | wx.EXPAND, 5)
@@ -1050,9 +1203,21 @@ class editPulses(wx.Dialog):
 
 		panel.SetSizer(vbox)
 		self.panel = panel
+		self.onMode()
 
 		self.Centre() 
 
+	def onMode(self,e=0):
+		if self.mode.GetValue() == 'frequency':
+			self.engine.Disable()
+			self.average.Disable()
+			self.gate.Enable()
+			if e and self.reject.GetValue() == '10.0': self.reject.SetValue('0.0')
+		else:
+			self.engine.Enable()
+			self.average.Enable()
+			self.gate.Disable()
+			if e and self.reject.GetValue() == '0.0': self.reject.SetValue('10.0')
 
 	def onSelectGpio(self,e):
 		gpioPin = '0'
@@ -1105,6 +1270,15 @@ class editPulses(wx.Dialog):
 		self.rate.SetValue('1')
 		self.pulses.SetValue('1')
 		self.pull.SetValue('down')
+		self.engine.SetValue('pigpio')
+		self.average.SetValue('1')
+		self.mode.SetValue('period')
+		self.gate.SetValue('1.0')
+		self.reject.SetValue('10.0')
+		self.deadband.SetValue('0.0')
+		self.relative.SetSelection(0)
+		self.heartbeat.SetValue('0.0')
+		self.onMode()
 		self.calibration.SetValue('1.0')
 
 	def ok(self,e):
@@ -1119,6 +1293,31 @@ class editPulses(wx.Dialog):
 		except:
 			wx.MessageBox(_('"Pulses per revolution" value has to be a number.'), _('Error'), wx.OK | wx.ICON_ERROR)
 			return
+		try: test = int(self.average.GetValue())
+		except: test = 0
+		if test < 1:
+			wx.MessageBox(_('"Average (pulses)" value has to be a number greater than 0.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
+		try: test = float(self.gate.GetValue())
+		except: test = 0
+		if test <= 0:
+			wx.MessageBox(_('"Gate" value has to be a number greater than 0.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
+		try: test = float(self.reject.GetValue())
+		except: test = -1
+		if test < 0:
+			wx.MessageBox(_('"Reject pulses shorter than" value has to be a positive number.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
+		try: test = float(self.deadband.GetValue())
+		except: test = -1
+		if test < 0:
+			wx.MessageBox(_('"Deadband" value has to be a positive number.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
+		try: test = float(self.heartbeat.GetValue())
+		except: test = -1
+		if test < 0:
+			wx.MessageBox(_('"Heartbeat" value has to be a positive number.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
 		if self.speedSK.GetValue() or self.distanceSK.GetValue():
 			if not self.radius.GetValue():
 				wx.MessageBox(_('To get "Speed" or "Distance" enter the radius.'), _('Error'), wx.OK | wx.ICON_ERROR)
@@ -1142,7 +1341,7 @@ class editDigital(wx.Dialog):
 		if edit: title = _('Editing GPIO digital input')
 		else: title = _('Adding GPIO digital input')
 
-		wx.Dialog.__init__(self, None, title=title, size=(500, 410))
+		wx.Dialog.__init__(self, None, title=title, size=(500, 530))
 		self.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
 		panel = wx.Panel(self)
 
@@ -1214,6 +1413,37 @@ class editDigital(wx.Dialog):
 			self.visualL.SetValue(edit['low']['visual'])
 			self.soundL.SetValue(edit['low']['sound'])
 
+		filterLabel= wx.StaticText(panel, label = _('debounce filter'))
+		self.filter = wx.ComboBox(panel, choices = [_('none'),_('glitch'),_('noise')], style=wx.CB_READONLY)
+		self.filter.Bind(wx.EVT_COMBOBOX, self.onFilter)
+		if edit and 'filter' in edit and edit['filter'] == 'glitch': self.filter.SetSelection(1)
+		elif edit and 'filter' in edit and edit['filter'] == 'noise': self.filter.SetSelection(2)
+		else: self.filter.SetSelection(0)
+		self.filter.SetToolTip(_('glitch: ignore levels shorter than "steady". noise: also ignore an input that changes more than once within "active" after a steady level. Only used by edge mode.'))
+
+		steadyLabel= wx.StaticText(panel, label = _('steady (µs)'))
+		self.steady = wx.TextCtrl(panel)
+		if edit and 'steady' in edit: self.steady.SetValue(str(edit['steady']))
+		else: self.steady.SetValue('10000')
+
+		activeLabel= wx.StaticText(panel, label = _('active (µs)'))
+		self.active = wx.TextCtrl(panel)
+		if edit and 'active' in edit: self.active.SetValue(str(edit['active']))
+		else: self.active.SetValue('100000')
+
+		holdLabel= wx.StaticText(panel, label = _('minimum hold (seconds)'))
+		self.hold = wx.TextCtrl(panel)
+		self.hold.SetToolTip(_('Minimum time between two notifications, the last level is sent when it expires'))
+		if edit and 'hold' in edit: self.hold.SetValue(str(edit['hold']))
+		else: self.hold.SetValue('0.0')
+
+		rateLabel= wx.StaticText(panel, label = _('notifications per minute'))
+		self.rate = wx.TextCtrl(panel)
+		self.rate.SetToolTip(_('0 = unlimited'))
+		if edit and 'rate' in edit: self.rate.SetValue(str(edit['rate']))
+		else: self.rate.SetValue('0')
+		self.onFilter()
+
 		cancelBtn = wx.Button(panel, wx.ID_CANCEL)
 		okBtn = wx.Button(panel, wx.ID_OK)
 		okBtn.Bind(wx.EVT_BUTTON, self.ok)
@@ -1261,6 +1491,25 @@ class editDigital(wx.Dialog):
 		h3.Add(v1, 1, wx.ALL | wx.EXPAND, 0)
 		h3.Add(v2, 1, wx.ALL | wx.EXPAND, 0)
 
+		h7 = wx.BoxSizer(wx.HORIZONTAL)
+		h7.Add(filterLabel, 0, wx.UP | wx.EXPAND, 10)
+		h7.AddSpacer(5)
+		h7.Add(self.filter, 1, wx.ALL | wx.EXPAND, 5)
+		h7.Add(steadyLabel, 0, wx.UP | wx.EXPAND, 10)
+		h7.AddSpacer(5)
+		h7.Add(self.steady, 1, wx.ALL | wx.EXPAND, 5)
+		h7.Add(activeLabel, 0, wx.UP | wx.EXPAND, 10)
+		h7.AddSpacer(5)
+		h7.Add(self.active, 1, wx.ALL | wx.EXPAND, 5)
+
+		h8 = wx.BoxSizer(wx.HORIZONTAL)
+		h8.Add(holdLabel, 0, wx.UP | wx.EXPAND, 10)
+		h8.AddSpacer(5)
+		h8.Add(self.hold, 1, wx.ALL | wx.EXPAND, 5)
+		h8.Add(rateLabel, 0, wx.UP | wx.EXPAND, 10)
+		h8.AddSpacer(5)
+		h8.Add(self.rate, 1, wx.ALL | wx.EXPAND, 5)
+
 		actionbox = wx.BoxSizer(wx.HORIZONTAL)
 		actionbox.AddStretchSpacer(1)
 		actionbox.Add(cancelBtn, 0, wx.LEFT | wx.EXPAND, 10)
@@ -1279,6 +1528,9 @@ class editDigital(wx.Dialog):
 		vbox.Add(h6, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
 		vbox.AddSpacer(10)
 		vbox.Add(h3, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
+		vbox.AddSpacer(10)
+		vbox.Add(h7, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
+		vbox.Add(h8, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
 		vbox.AddStretchSpacer(1)
 		vbox.Add(actionbox, 0, wx.ALL | wx.EXPAND, 10)
 
@@ -1292,6 +1544,17 @@ class editDigital(wx.Dialog):
 		else: self.host.Enable()
 		self.gpio.SetValue('')
 
+	def onFilter(self,e=0):
+		if self.filter.GetSelection() == 0: 
+			self.steady.Disable()
+			self.active.Disable()
+		elif self.filter.GetSelection() == 1: 
+			self.steady.Enable()
+			self.active.Disable()
+		else: 
+			self.steady.Enable()
+			self.active.Enable()
+
 	def onSelectGpio(self,e):
 		if not self.localhost.GetValue():
 			if not self.host.GetValue():
@@ -1321,6 +1584,26 @@ class editDigital(wx.Dialog):
 		if not self.gpio.GetValue():
 			wx.MessageBox(_('Enter the GPIO.'), _('Error'), wx.OK | wx.ICON_ERROR)
 			return
+		try: test = int(self.steady.GetValue())
+		except: test = -1
+		if test < 0 or test > 300000:
+			wx.MessageBox(_('"steady" value has to be a number between 0 and 300000.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
+		try: test = int(self.active.GetValue())
+		except: test = -1
+		if test < 0 or test > 1000000:
+			wx.MessageBox(_('"active" value has to be a number between 0 and 1000000.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
+		try: test = float(self.hold.GetValue())
+		except: test = -1
+		if test < 0:
+			wx.MessageBox(_('"minimum hold" value has to be a positive number.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
+		try: test = int(self.rate.GetValue())
+		except: test = -1
+		if test < 0:
+			wx.MessageBox(_('"notifications per minute" value has to be a positive integer.'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
 
 		self.EndModal(wx.ID_OK)
 
@@ -1332,7 +1615,7 @@ class editDigitalOut(wx.Dialog):
 		if edit: title = _('Editing GPIO digital output')
 		else: title = _('Adding GPIO digital output')
 
-		wx.Dialog.__init__(self, None, title=title, size=(300, 180))
+		wx.Dialog.__init__(self, None, title=title, size=(300, 220))
 		self.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
 		panel = wx.Panel(self)
 
@@ -1355,6 +1638,11 @@ class editDigitalOut(wx.Dialog):
 		selectGpio.Bind(wx.EVT_BUTTON, self.onSelectGpio)
 		if edit: self.gpio.SetValue(edit['gpio'])
 
+		groupLabel = wx.StaticText(panel, label=_('Group'))
+		self.group = wx.TextCtrl(panel)
+		self.group.SetToolTip(_('Outputs in the same group can be switched together in one action'))
+		if edit and 'group' in edit: self.group.SetValue(edit['group'])
+
 		self.notLabel = wx.StaticText(panel, label = 'notifications.GPIO'+self.gpio.GetValue())
 		font = wx.Font(12, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD)
 		self.notLabel.SetFont(font)
@@ -1371,6 +1659,10 @@ class editDigitalOut(wx.Dialog):
 		h2.Add(self.gpio, 1, wx.ALL | wx.EXPAND, 5)
 		h2.Add(selectGpio, 0, wx.ALL | wx.EXPAND, 5)
 
+		h3 = wx.BoxSizer(wx.HORIZONTAL)
+		h3.Add(groupLabel, 0, wx.ALL | wx.EXPAND, 5)
+		h3.Add(self.group, 1, wx.ALL | wx.EXPAND, 5)
+
 		actionbox = wx.BoxSizer(wx.HORIZONTAL)
 		actionbox.AddStretchSpacer(1)
 		actionbox.Add(cancelBtn, 0, wx.LEFT | wx.EXPAND, 10)
@@ -1385,6 +1677,7 @@ class editDigitalOut(wx.Dialog):
 		vbox.AddSpacer(5)
 		vbox.Add(h1, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
 		vbox.Add(h2, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
+		vbox.Add(h3, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
 		vbox.AddSpacer(10)
 		vbox.Add(h6, 0, wx.RIGHT | wx.LEFT | wx.EXPAND, 5)
 		vbox.AddStretchSpacer(1)
@@ -1429,6 +1722,10 @@ class editDigitalOut(wx.Dialog):
 		if not self.gpio.GetValue():
 			wx.MessageBox(_('Enter the GPIO.'), _('Error'), wx.OK | wx.ICON_ERROR)
 			return
+		group = self.group.GetValue()
+		if group and not group.replace('_','').isalnum():
+			wx.MessageBox(_('Group names can only contain letters, numbers and _'), _('Error'), wx.OK | wx.ICON_ERROR)
+			return
 
 		self.EndModal(wx.ID_OK)
 
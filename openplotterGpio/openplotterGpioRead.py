@@ -15,52 +15,612 @@
 # You should have received a copy of the GNU General Public License
 # along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
 
-import threading, time, pigpio, math, ujson, ssl, subprocess, sys
-import RPi.GPIO as GPIO
+import threading, time, pigpio, math, ujson, ssl, subprocess, sys, signal, asyncio, collections, concurrent.futures, os, copy
+try: import RPi.GPIO as GPIO
+except: pass # only on a Raspberry Pi, the rest of the module is also used by benchmarks
 from openplotterSettings import conf
 from openplotterSettings import platform
 from websocket import create_connection
+from . import config
+from . import control
+from . import metrics
+from . import simulation
+from . import recorder
 try: from w1thermsensor import W1ThermSensor, Unit
 except: pass
 
 class rpmReader:
-	def __init__(self, TACH, pulses_per_rev=1.0, pull='down'):
+	def __init__(self, TACH, pulses_per_rev=1.0, pull='down', reject=10, recorder=None):
 		GPIO.setmode(GPIO.BCM)
 		GPIO.setwarnings(False)
 		if pull== 'up': GPIO.setup(TACH, GPIO.IN, pull_up_down=GPIO.PUD_UP)
 		elif pull == 'down': GPIO.setup(TACH, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
 		else: GPIO.setup(TACH, GPIO.IN)
+		self.initState(TACH, pulses_per_rev, reject)
+		self.recorder = recorder
 		GPIO.add_event_detect(TACH, GPIO.FALLING, self.fell)
-		self.t = time.time()
+
+	def initState(self, TACH, pulses_per_rev=1.0, reject=10, clock=time.monotonic):
+		# everything but the hardware, replay and benchmarks run the reader on their own clock
+		self.clock = clock
+		self.recorder = None
+		self.t = clock()
 		self.rpm = 0
 		self.counter = 0
 		self.pulsesCounter = 0
+		self.TACH = TACH
 		self.pulses_per_rev = pulses_per_rev
+		self.reject = reject / 1000.0
 		
 	def fell(self,n):
-		dt = time.time() - self.t
-		if dt < 0.01: return # reject spuriously short pulses
+		now = self.clock()
+		if self.recorder: self.recorder.record(n, 0, int(now*1000000), recorder.monotonic)
+		dt = now - self.t
+		if dt < self.reject: return # reject spuriously short pulses
 		freq = 1 / dt
 		self.rpm = (freq / self.pulses_per_rev) * 60
 		self.pulsesCounter = self.pulsesCounter + 1
 		if self.pulsesCounter == self.pulses_per_rev:
 			self.counter = self.counter + 1
 			self.pulsesCounter = 0
-			self.t = time.time()
+			self.t = now
 		
 	def cancel(self):
-		GPIO.cleanup()
-		sys.exit()
+		# only this channel, the other RPi.GPIO channels keep running on reload
+		GPIO.remove_event_detect(self.TACH)
+		GPIO.cleanup(self.TACH)
+
+class tickReader:
+	# times pulses with pigpiod hardware ticks (microseconds, wrap every ~72 min) and averages the last N intervals
+	def __init__(self, TACH, pulses_per_rev=1.0, pull='down', average=1, reject=10, pool=None, recorder=None):
+		self.pool = pool
+		if pool: self.pi = pool.get('localhost')
+		else: self.pi = pigpio.pi()
+		if not self.pi.connected: raise Exception('pigpiod is not running')
+		self.pi.set_mode(TACH, pigpio.INPUT)
+		if pull == 'up': self.pi.set_pull_up_down(TACH, pigpio.PUD_UP)
+		elif pull == 'down': self.pi.set_pull_up_down(TACH, pigpio.PUD_DOWN)
+		else: self.pi.set_pull_up_down(TACH, pigpio.PUD_OFF)
+		self.initState(pulses_per_rev, average, reject)
+		self.recorder = recorder
+		self.cb = self.pi.callback(TACH, pigpio.FALLING_EDGE, self.fell)
+
+	def initState(self, pulses_per_rev=1.0, average=1, reject=10, clock=time.monotonic):
+		# everything but the hardware, replay and benchmarks run the reader on their own clock
+		self.clock = clock
+		self.recorder = None
+		self.counter = 0
+		self.pulsesCounter = 0
+		self.pulses_per_rev = pulses_per_rev
+		self.minInterval = int(reject * 1000) # reject spuriously short pulses
+		self.maxInterval = 2000000 # min rpm = 30, longer gaps restart the average
+		self.size = max(1, int(average))
+		self.intervals = [0] * self.size
+		self.index = 0
+		self.filled = 0
+		self.total = 0
+		self.lastTick = 0
+		self.primed = False
+		self.pulses = 0
+		self.seenPulses = 0
+		self.seenAt = clock()
+
+	def fell(self, gpio, level, tick):
+		# hot path: fixed-size buffer and running sum, nothing is appended or created here
+		if self.recorder: self.recorder.record(gpio, level, tick)
+		if not self.primed:
+			self.lastTick = tick
+			self.primed = True
+			return
+		dt = (tick - self.lastTick) & 0xFFFFFFFF
+		if dt < self.minInterval: return
+		self.lastTick = tick
+		self.pulses += 1
+		self.pulsesCounter += 1
+		if self.pulsesCounter >= self.pulses_per_rev:
+			self.counter += 1
+			self.pulsesCounter = 0
+		if dt > self.maxInterval:
+			self.restart()
+			return
+		index = self.index
+		self.total += dt - self.intervals[index]
+		self.intervals[index] = dt
+		index += 1
+		if index == self.size: index = 0
+		self.index = index
+		if self.filled < self.size: self.filled += 1
+
+	def restart(self):
+		for i in range(self.size): self.intervals[i] = 0
+		self.index = 0
+		self.filled = 0
+		self.total = 0
+
+	@property
+	def rpm(self):
+		filled = self.filled
+		total = self.total
+		if not filled or total <= 0: return 0
+		return 60000000.0 * filled / (total * self.pulses_per_rev)
+
+	@property
+	def t(self):
+		# monotonic time of the last pulse, sampled by the reader instead of the callback
+		if self.pulses != self.seenPulses:
+			self.seenPulses = self.pulses
+			self.seenAt = self.clock()
+		return self.seenAt
+
+	def cancel(self):
+		try: self.cb.cancel()
+		except: pass
+		if self.pool: self.pool.release(self.pi)
+		else: self.pi.stop()
+
+class freqReader:
+	# counts edges over a gate window for fast inputs, pigpiod's glitch filter rejects short pulses before they reach python.
+	# pigpio still tallies every edge in python in the notification thread of the connection, a few kHz take a noticeable
+	# share of a core on a Pi, so the channel has a connection of its own and never delays the callbacks of the pool
+	def __init__(self, TACH, pulses_per_rev=1.0, pull='down', gate=1.0, reject=0):
+		self.TACH = TACH
+		self.pi = pigpio.pi()
+		if not self.pi.connected: raise Exception('pigpiod is not running')
+		self.pi.set_mode(TACH, pigpio.INPUT)
+		if pull == 'up': self.pi.set_pull_up_down(TACH, pigpio.PUD_UP)
+		elif pull == 'down': self.pi.set_pull_up_down(TACH, pigpio.PUD_DOWN)
+		else: self.pi.set_pull_up_down(TACH, pigpio.PUD_OFF)
+		self.pi.set_glitch_filter(TACH, int(reject * 1000))
+		self.counter = 0
+		self.pulsesCounter = 0
+		self.pulses_per_rev = pulses_per_rev
+		self.gate = gate
+		self.freq = 0
+		self.lastEdge = time.monotonic()
+		self.cb = self.pi.callback(TACH, pigpio.FALLING_EDGE) # no function, the tally is read once per gate
+		self.lastTally = 0
+		self.gateTick = self.pi.get_current_tick()
+		# the gate has its own timer, the pigpiod requests stay off the loop and the gate does not depend on the rate
+		self.stopped = threading.Event()
+		self.thread = threading.Thread(target=self.run, name='GPIO gate '+str(TACH), daemon=True)
+		self.thread.start()
+
+	def run(self):
+		while not self.stopped.wait(self.gate):
+			try: self.update()
+			except: pass # pigpiod restarting or the reader cancelled meanwhile
+
+	def update(self):
+		now = time.monotonic()
+		tally = self.cb.tally()
+		tick = self.pi.get_current_tick()
+		edges = tally - self.lastTally
+		dt = (tick - self.gateTick) & 0xFFFFFFFF
+		self.lastTally = tally
+		self.gateTick = tick
+		if dt: self.freq = edges * 1000000.0 / dt
+		if edges:
+			self.lastEdge = now
+			self.pulsesCounter += edges
+			self.counter += self.pulsesCounter // self.pulses_per_rev
+			self.pulsesCounter = self.pulsesCounter % self.pulses_per_rev
+
+	@property
+	def rpm(self):
+		return (self.freq / self.pulses_per_rev) * 60
+
+	@property
+	def t(self):
+		if self.freq: return time.monotonic()
+		return self.lastEdge
+
+	def cancel(self):
+		self.stopped.set()
+		try: self.cb.cancel()
+		except: pass
+		# pigpiod keeps the filter after we disconnect, the next user of the pin would inherit it
+		try: self.pi.set_glitch_filter(self.TACH, 0)
+		except: pass
+		self.pi.stop()
+
+class piPool:
+	# one pigpiod connection per host shared by every channel on it, closed when the last user releases it
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.hosts = {}
+		self.refs = {}
+
+	def get(self, host):
+		with self.lock:
+			if host in self.hosts: pi = self.hosts[host]
+			else:
+				pi = pigpio.pi(host)
+				if not pi.connected: raise Exception('pigpiod is not reachable at '+host)
+				self.hosts[host] = pi
+				self.refs[id(pi)] = [pi, host, 0]
+			self.refs[id(pi)][2] += 1
+			return pi
+
+	def release(self, pi):
+		with self.lock:
+			if not id(pi) in self.refs: return
+			entry = self.refs[id(pi)]
+			entry[2] -= 1
+			if entry[2] > 0: return
+			del self.refs[id(pi)]
+			if entry[1] in self.hosts and self.hosts[entry[1]] is pi: del self.hosts[entry[1]]
+		try: pi.stop()
+		except: pass
+
+	def check(self):
+		# one request per host instead of one per channel, lost hosts get a new connection on the next get
+		lost = []
+		with self.lock: hosts = list(self.hosts.items())
+		for host, pi in hosts:
+			try: pi.get_current_tick()
+			except:
+				lost.append(host)
+				with self.lock:
+					if host in self.hosts and self.hosts[host] is pi: del self.hosts[host]
+		return lost
+
+class oneWireBus:
+	# kernel w1 bus masters through sysfs, therm_bulk_read starts a conversion on every sensor at once
+	def __init__(self, root='/sys/bus/w1/devices'):
+		self.root = root
+
+	def masters(self):
+		masters = []
+		try:
+			for i in os.listdir(self.root):
+				if i.startswith('w1_bus_master') and os.path.exists(self.root+'/'+i+'/therm_bulk_read'): masters.append(i)
+		except: pass
+		return masters
+
+	def bulkCapable(self, sid):
+		# parasite powered sensors and kernels without these attributes need one read per sensor
+		try:
+			with open(self.root+'/'+sid+'/ext_power') as f:
+				if f.read().strip() != '1': return False
+		except: return False
+		return os.path.exists(self.root+'/'+sid+'/temperature')
+
+	def trigger(self):
+		for i in self.masters():
+			with open(self.root+'/'+i+'/therm_bulk_read', 'w') as f: f.write('trigger\n')
+
+	def converting(self):
+		for i in self.masters():
+			with open(self.root+'/'+i+'/therm_bulk_read') as f:
+				if f.read().strip() == '-1': return True
+		return False
+
+	def hasTemperature(self, sid):
+		return os.path.exists(self.root+'/'+sid+'/temperature')
+
+	def temperature(self, sid):
+		with open(self.root+'/'+sid+'/temperature') as f:
+			return int(f.read().strip()) / 1000.0 + 273.15
+
+	def setResolution(self, sid, bits):
+		path = self.root+'/'+sid+'/resolution'
+		try:
+			with open(path) as f:
+				if f.read().strip() == str(bits): return
+		except: pass
+		try:
+			with open(path, 'w') as f: f.write(str(bits)+'\n')
+		except PermissionError:
+			# the attribute belongs to root, the reader runs as the desktop user
+			subprocess.run(['sudo', '-n', 'tee', path], input=(str(bits)+'\n').encode(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
+class skTemplate:
+	# $source and path fragments never change between config loads, so they are serialized once
+	def __init__(self, source, paths):
+		self.source = source
+		self.head = '","$source":'+ujson.dumps(source)+',"values":[' # follows the timestamp of each update
+		self.keys = {}
+		for path in paths: self.keys[path] = '{"path":'+ujson.dumps(path)+',"value":'
+
+class deadband:
+	# send on change, a value goes out when it moved beyond the band or its heartbeat expired
+	def __init__(self, band=0.0, relative=False, heartbeat=0.0):
+		self.band = band
+		self.relative = relative
+		self.heartbeat = heartbeat
+		self.enabled = band > 0 or heartbeat > 0
+		self.last = {}
+		self.sent = {}
+
+	def check(self, path, value, now):
+		if not self.enabled: return True
+		if path in self.last:
+			if not self.heartbeat or now - self.sent[path] < self.heartbeat:
+				if self.relative: limit = abs(self.last[path]) * self.band / 100.0
+				else: limit = self.band
+				if abs(value - self.last[path]) <= limit: return False
+		self.last[path] = value
+		self.sent[path] = now
+		return True
+
+def deadbandSettings(channel):
+	return deadband(channel.deadband, channel.relative, channel.heartbeat)
+
+class counterStore:
+	# pulse counters survive restarts, the file is only rewritten when a counter moved and at most once per flush interval
+	def __init__(self, path, interval=60.0):
+		self.path = path
+		self.interval = interval
+		self.saved = {}
+		self.lock = threading.Lock()
+
+	def load(self):
+		self.saved = {}
+		try:
+			with open(self.path) as f: data = ujson.load(f)
+			for i in data: self.saved[str(i)] = int(data[i])
+		except: pass
+		return dict(self.saved)
+
+	def save(self, counters):
+		with self.lock:
+			if counters == self.saved: return
+			# a power cut leaves either the old or the new file, never a torn one
+			tmp = self.path+'.tmp'
+			with open(tmp, 'w') as f:
+				f.write(ujson.dumps(counters))
+				f.flush()
+				os.fsync(f.fileno())
+			os.replace(tmp, self.path)
+			self.saved = dict(counters)
+
+def pulseCompute(channel, rpm, counter, age):
+	# Signal K values of a pulse channel, age is the time since the last pulse. Shared with openplotter-gpio-replay
+	values = []
+	radius = channel.radius
+	if age > 2: # min rpm = 30
+		hertz = 0
+		rps = 0
+	else:
+		hertz = rpm/60
+		rps = rpm*(math.pi/30)
+	if radius: 
+		lSpeed = rps*radius
+		distance = counter*((2*math.pi)*radius)
+		if channel.linearSpeed: values.append((channel.linearSpeed, lSpeed*channel.calibration))
+		if channel.distance: values.append((channel.distance, distance))
+	if channel.revolutions: values.append((channel.revolutions, hertz))
+	if channel.revCounter: values.append((channel.revCounter, counter))
+	return values
+
+def utcTimestamp(now):
+	return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now))+'.%03dZ' % (int(now*1000) % 1000)
+
+class skWriter:
+	# the only task that sends to the websocket, values that get ready within the window go out as one delta
+	def __init__(self, process, window=0.05, bufferSize=1024, bufferPolicy='oldest', bufferRate=20):
+		self.process = process
+		self.window = window
+		# deltas are kept here while SK is unreachable and replayed in order when it comes back
+		self.buffer = collections.deque()
+		self.bufferBytes = 0
+		self.bufferSize = bufferSize*1024
+		self.bufferPolicy = bufferPolicy
+		self.bufferRate = bufferRate
+		self.buffered = 0
+		self.overflow = 0
+		self.lock = threading.Lock()
+		self.ready = None
+		self.pending = {} # latest value wins per source and path, so memory is bounded by the number of paths
+		self.notices = [] # notifications, every change is sent and they do not wait for the buffer to replay
+		self.frames = []
+		self.parts = []
+		self.sender = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='GPIO SK sender')
+		self.sentFrames = 0
+		self.sentBytes = 0
+		self.suppressed = 0
+		self.statsStart = time.monotonic()
+
+	def putChanged(self, template, band, path, value, now):
+		if band.check(path, value, now): self.put(template, path, repr(value), now)
+		else: 
+			self.suppressed += 1
+			self.process.metrics.inc('suppressed_values_total')
+
+	def put(self, template, path, value, acquired=None):
+		# acquired is the monotonic time the value was measured, it becomes the update timestamp
+		if acquired is None: acquired = time.monotonic()
+		with self.lock: 
+			if template in self.pending: self.pending[template][path] = (value, acquired)
+			else: self.pending[template] = {path: (value, acquired)}
+		self.wake()
+
+	def putNotice(self, template, path, value, acquired=None):
+		if acquired is None: acquired = time.monotonic()
+		with self.lock: self.notices.append((template, path, value, acquired))
+		self.wake()
+
+	def putFrame(self, frame):
+		with self.lock: self.frames.append(frame)
+		self.wake()
+
+	def wake(self):
+		# producers can live in the loop or in executor threads
+		if self.ready: self.process.loop.call_soon_threadsafe(self.ready.set)
+
+	def delta(self, pending):
+		parts = self.parts
+		del parts[:]
+		parts.append('{"updates":[')
+		# monotonic to UTC once per batch, values measured together share one update
+		offset = time.time() - time.monotonic()
+		stamps = {}
+		for template in pending:
+			values = pending[template]
+			keys = template.keys
+			updates = {}
+			for path in values:
+				acquired = values[path][1]
+				if acquired in updates: updates[acquired].append(path)
+				else: updates[acquired] = [path]
+			for acquired in updates:
+				if not acquired in stamps: stamps[acquired] = utcTimestamp(offset+acquired)
+				parts.append('{"timestamp":"')
+				parts.append(stamps[acquired])
+				parts.append(template.head)
+				for path in updates[acquired]:
+					parts.append(keys[path])
+					parts.append(values[path][0])
+					parts.append('},')
+				parts[-1] = '}]},'
+		parts[-1] = '}]}]}\n'
+		return ''.join(parts)
+
+	async def run(self):
+		self.ready = asyncio.Event()
+		self.replaying = asyncio.ensure_future(self.replay())
+		while True:
+			await self.ready.wait()
+			await asyncio.sleep(self.window)
+			try:
+				with self.lock:
+					pending = self.pending
+					notices = self.notices
+					frames = self.frames
+					self.pending = {}
+					self.notices = []
+					self.frames = []
+					self.ready.clear()
+				# an alarm is stale after a replay of minutes, it goes first and only data keeps the order
+				# one delta each, high then low within the window must not collapse into low
+				alerts = []
+				for template, path, value, acquired in notices: alerts.append(self.delta({template: {path: (value, acquired)}}))
+				if alerts and not self.process.ws:
+					for notice in alerts: self.store(notice)
+					alerts = []
+				frames = alerts + frames
+				delta = False
+				if pending: delta = self.delta(pending)
+				# while anything is waiting in the buffer new deltas queue behind it to keep the order
+				if delta and (self.buffer or not self.process.ws): 
+					self.store(delta)
+					delta = False
+				if delta: frames.append(delta)
+				# a slow send must not hold up the loop where acquisition runs
+				sent = await self.process.loop.run_in_executor(self.sender, self.send, frames)
+				for notice in alerts[sent:]: self.store(notice)
+				if delta and sent < len(frames): self.store(delta)
+				if self.process.debug and time.monotonic() - self.statsStart > 60: self.stats()
+			except Exception as e: 
+				if self.process.debug: print('Sending GPIO data to SK error: '+str(e))
+
+	def store(self, frame):
+		size = len(frame)
+		if size > self.bufferSize: 
+			self.overflow += 1
+			self.process.metrics.inc('buffer_overflow_total')
+			return
+		while self.bufferBytes + size > self.bufferSize:
+			self.overflow += 1
+			self.process.metrics.inc('buffer_overflow_total')
+			if self.bufferPolicy == 'newest': return
+			self.bufferBytes -= len(self.buffer.popleft())
+		self.buffer.append(frame)
+		self.bufferBytes += size
+		self.buffered += 1
+		self.process.metrics.inc('buffered_frames_total')
+
+	async def replay(self):
+		# buffered deltas go out at a limited rate so SK is not flooded right after it restarts
+		while True:
+			await self.process.connected.wait()
+			if not self.buffer: 
+				await asyncio.sleep(1)
+				continue
+			frame = self.buffer[0]
+			sent = await self.process.loop.run_in_executor(self.sender, self.send, [frame])
+			if sent and self.buffer and self.buffer[0] is frame:
+				self.buffer.popleft()
+				self.bufferBytes -= len(frame)
+			if not self.buffer: self.ready.set()
+			await asyncio.sleep(1.0/self.bufferRate)
+
+	def send(self, frames):
+		ws = self.process.ws
+		sent = 0
+		if not ws: return sent
+		start = time.perf_counter()
+		size = 0
+		try: 
+			for frame in frames:
+				ws.send(frame)
+				self.sentFrames += 1
+				self.sentBytes += len(frame)
+				size += len(frame)
+				sent += 1
+		except: self.process.dropped(ws)
+		if frames: self.process.metrics.observe('send_seconds', time.perf_counter() - start)
+		self.process.metrics.inc('sent_frames_total', sent)
+		self.process.metrics.inc('sent_bytes_total', size)
+		return sent
+
+	def depth(self):
+		with self.lock:
+			values = 0
+			for template in self.pending: values += len(self.pending[template])
+			values += len(self.notices)
+			frames = len(self.frames)
+		return values, frames
+
+	def stats(self):
+		seconds = time.monotonic() - self.statsStart
+		print('GPIO to SK: '+str(round(self.sentFrames/seconds, 2))+' frames/s, '+str(round(self.sentBytes/seconds, 1))+' bytes/s, '+str(self.suppressed)+' unchanged values suppressed')
+		if self.buffered or self.buffer: print('GPIO to SK buffer: '+str(len(self.buffer))+' deltas ('+str(self.bufferBytes)+' bytes) waiting, '+str(self.buffered)+' buffered, '+str(self.overflow)+' lost to overflow')
+		self.sentFrames = 0
+		self.sentBytes = 0
+		self.suppressed = 0
+		self.buffered = 0
+		self.overflow = 0
+		self.statsStart = time.monotonic()
 
 ############################################################################################
 
 class Process:
 	def __init__(self):
 		self.ws = False
+		self.loop = None
 		self.instances = {}
+		self.templates = {}
 		self.conf = conf.Conf()
 		if self.conf.get('GENERAL', 'debug') == 'yes': self.debug = True
 		else: self.debug = False
+		self.metrics = metrics.registry()
+		self.samples = {} # monotonic time of the latest sample per channel
+		try: window = float(self.conf.get('GPIO', 'window'))
+		except: window = 0.05
+		try: bufferSize = int(self.conf.get('GPIO', 'bufferSize'))
+		except: bufferSize = 1024 # KB
+		bufferPolicy = self.conf.get('GPIO', 'bufferPolicy')
+		if bufferPolicy != 'newest': bufferPolicy = 'oldest'
+		try: bufferRate = float(self.conf.get('GPIO', 'bufferRate'))
+		except: bufferRate = 20.0 # deltas per second
+		if bufferRate <= 0: bufferRate = 20.0
+		self.writer = skWriter(self, window, bufferSize, bufferPolicy, bufferRate)
+		try: counterFlush = float(self.conf.get('GPIO', 'counterFlush'))
+		except: counterFlush = 60.0 # seconds
+		self.counterStore = counterStore(self.conf.conf_folder+'/openplotter-gpio-counters.json', counterFlush)
+		self.counters = self.counterStore.load()
+		self.receiver = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='GPIO SK receiver')
+		self.pool = piPool()
+		self.recorder = None
+		if self.conf.get('GPIO', 'record'):
+			try: recordSize = float(self.conf.get('GPIO', 'recordSize'))
+			except: recordSize = 16 # MB per file
+			try: recordFiles = int(self.conf.get('GPIO', 'recordFiles'))
+			except: recordFiles = 4
+			self.recorder = recorder.edgeRecorder(self.conf.get('GPIO', 'record'), recordSize, recordFiles)
+		self.outputs = {}
+		self.outputsLock = threading.Lock()
 
 	def connect(self):
 		self.platform = platform.Platform()
@@ -70,277 +630,740 @@ class Process:
 			headers = {'Authorization': 'Bearer '+token}
 			self.ws = create_connection(uri, header=headers, sslopt={"cert_reqs": ssl.CERT_NONE})
 
-	def oneW(self,oneWlist):
-		ticks = {}
+	def dropped(self,ws):
+		# called from any thread when a send or receive fails
+		if self.ws is ws: 
+			self.ws = False
+			self.metrics.inc('sk_disconnects_total')
+		try: ws.close()
+		except: pass
+		self.loop.call_soon_threadsafe(self.disconnected.set)
+
+	async def connection(self):
 		while True:
-			time.sleep(0.1)
-			try:
-				for sensor in W1ThermSensor.get_available_sensors():
-					sid = sensor.id
-					if sid in oneWlist:
-						sk = oneWlist[sid]['sk']
-						if sk:
-							offset = oneWlist[sid]['offset']
-							value = str(offset+sensor.get_temperature(Unit.KELVIN))
-							if not sid in ticks: ticks[sid] = time.time()
-							rate = oneWlist[sid]['rate']
-							now = time.time()
-							if now - ticks[sid] > rate:
-								SignalK = '{"updates":[{"$source":"OpenPlotter.GPIO.1W.'+sid+'","values":[{"path":"'+sk+'","value":'+value+'}]}]}\n'
-								try: 
-									if self.ws: 
-										self.ws.send(SignalK)
-										ticks[sid] = time.time()
-									else: return
-								except: 
-									if self.ws: self.ws.close()
-									self.ws = False
-									return
+			if not self.ws:
+				try: await self.loop.run_in_executor(None, self.connect)
+				except Exception as e: 
+					self.metrics.inc('sk_connect_errors_total')
+					if self.debug: print('Error connecting to SK: '+str(e))
+			if self.ws:
+				self.metrics.inc('sk_connects_total')
+				self.disconnected.clear()
+				self.connected.set()
+				await self.disconnected.wait()
+				self.connected.clear()
+			else: await asyncio.sleep(5)
+
+	async def supervised(self,name,job):
+		# a job that returns or fails is restarted at once, only jobs that die straight away are held back
+		while True:
+			started = time.monotonic()
+			try: await job()
+			except asyncio.CancelledError: raise
 			except Exception as e: 
-				if self.debug: print('Reading GPIO 1W error: '+str(e))
-				return
+				if self.debug: print('GPIO '+name+' error: '+str(e))
+			self.metrics.inc('job_restarts_total', job=name)
+			if self.debug: print('Restarting GPIO '+name)
+			if time.monotonic() - started < 5: await asyncio.sleep(5)
 
-	def pulse(self,pulselist):
-		self.instances = {}
+	async def run(self,settings):
+		self.loop = asyncio.get_running_loop()
+		self.connected = asyncio.Event()
+		self.disconnected = asyncio.Event()
+		self.changed = asyncio.Event()
+		self.settings = settings
+		self.oneWlist = settings.oneW
+		self.pulselist = settings.pulses
+		self.digitalList = settings.digital
+		self.resetPaths = {}
+		self.loop.add_signal_handler(signal.SIGHUP, self.reload)
+		self.loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel) # lets the subsystems clean up and save counters
+		jobs = [self.writer.run(), self.connection()]
+		jobs.append(self.supervised('1W', self.oneW))
+		jobs.append(self.supervised('pulses', self.pulse))
+		jobs.append(self.supervised('pulses reset', self.subscribe))
+		jobs.append(self.supervised('digital', self.digital))
+		jobs.append(self.supervised('pigpio', self.health))
+		jobs.append(self.supervised('control', self.controlServer))
+		if self.conf.get('GPIO', 'metricsFile'): jobs.append(self.supervised('metrics', self.metricsFile))
+		if self.recorder: jobs.append(self.supervised('recorder', self.recording))
+		try: await asyncio.gather(*jobs)
+		finally:
+			# the receiver thread is blocked in recv(), the interpreter joins it before exiting
+			ws = self.ws
+			self.ws = False
+			if ws:
+				try: ws.shutdown()
+				except: pass
+
+	async def controlServer(self):
+		# actions and other local tools talk to the running reader here instead of opening their own connections
+		path = control.socketPath(self.conf)
+		try: os.unlink(path)
+		except: pass
+		server = await asyncio.start_unix_server(self.control, path)
+		os.chmod(path, 0o600)
+		try: await server.serve_forever()
+		finally:
+			server.close()
+			try: os.unlink(path)
+			except: pass
+
+	async def control(self,reader,writer):
+		try:
+			request = ujson.loads(await reader.readline())
+			response = {'result': await self.command(request)}
+		except Exception as e: response = {'error': str(e)}
+		try:
+			writer.write((ujson.dumps(response)+'\n').encode())
+			await writer.drain()
+		except: pass
+		writer.close()
+
+	async def command(self,request):
+		command = request['command']
+		self.metrics.inc('control_requests_total', command=command)
+		if command == 'write':
+			key = request['host']+'-'+str(request['gpio'])
+			if not key in self.digitalList or self.digitalList[key].mode != 'out': raise Exception(key+' is not a GPIO output')
+			await self.loop.run_in_executor(None, self.output, key, int(request['level']))
+			if 'notification' in request:
+				n = request['notification']
+				self.notify('OpenPlotter.GPIO.digital.'+str(self.digitalList[key].gpio),'notifications.GPIO'+str(self.digitalList[key].gpio),n['state'],n['message'],n['visual'],n['sound'])
+			return 'done'
+		elif command == 'group':
+			result = await self.loop.run_in_executor(None, self.groupOutput, request['name'], int(request['level']))
+			if 'notification' in request:
+				n = request['notification']
+				self.notify('OpenPlotter.GPIO.group.'+request['name'],'notifications.GPIOgroup.'+request['name'],n['state'],n['message'],n['visual'],n['sound'])
+			return result
+		elif command == 'reset':
+			i = str(request['gpio'])
+			if not i in self.instances: raise Exception('GPIO'+i+' is not counting pulses')
+			self.resetCounter(i)
+			return 'done'
+		elif command == 'reload':
+			self.reload()
+			return 'done'
+		elif command == 'metrics':
+			return self.metricsText()
+		raise Exception('unknown command '+str(command))
+
+	def metricsText(self):
+		now = time.monotonic()
+		current = {'1W': self.oneWlist, 'pulses': self.pulselist, 'digital': self.digitalList}
+		self.metrics.clear('sample_age_seconds')
+		for channel in list(self.samples):
+			kind, i = channel.split('.', 1)
+			if i in current[kind]: self.metrics.set('sample_age_seconds', now - self.samples[channel], channel=channel)
+			else: del self.samples[channel] # removed on reload
+		values, frames = self.writer.depth()
+		self.metrics.set('pending_values', values)
+		self.metrics.set('pending_frames', frames)
+		self.metrics.set('buffer_frames', len(self.writer.buffer))
+		self.metrics.set('buffer_bytes', self.writer.bufferBytes)
+		self.metrics.set('sk_connected', int(bool(self.ws)))
+		self.metrics.set('pigpio_connections', len(self.pool.hosts))
+		return self.metrics.text()
+
+	async def metricsFile(self):
+		path = self.conf.get('GPIO', 'metricsFile')
+		try: interval = float(self.conf.get('GPIO', 'metricsInterval'))
+		except: interval = 15.0 # seconds
+		if interval <= 0: interval = 15.0
+		while True:
+			try: await self.loop.run_in_executor(None, metrics.write, path, self.metricsText())
+			except Exception as e:
+				if self.debug: print('Writing GPIO metrics error: '+str(e))
+			await asyncio.sleep(interval)
+
+	async def recording(self):
+		try:
+			while True:
+				await asyncio.sleep(1)
+				await self.loop.run_in_executor(None, self.recorder.flush)
+				self.metrics.set('recorder_lost_edges', self.recorder.lost)
+		finally: self.recorder.close()
+
+	def outputPi(self,key):
+		# outputs keep their pooled connection between actions, call it holding outputsLock
+		if not key in self.outputs:
+			channel = self.digitalList[key]
+			pi = self.pool.get(channel.host)
+			self.outputs[key] = pi
+			pi.set_mode(channel.gpio, pigpio.OUTPUT)
+		return self.outputs[key]
+
+	def output(self,key,level):
+		channel = self.digitalList[key]
+		with self.outputsLock:
+			for retry in (True, False):
+				try: 
+					self.outputPi(key).write(channel.gpio, level)
+					return
+				except:
+					if key in self.outputs: self.pool.release(self.outputs.pop(key))
+					if not retry: raise # a dead connection is replaced once
+
+	def groupOutput(self,name,level):
+		# one bank write per host, pins on the same host change in the same instant
+		hosts = {}
+		for key in self.digitalList:
+			channel = self.digitalList[key]
+			if channel.mode == 'out' and channel.group == name:
+				if channel.host in hosts: hosts[channel.host].append(key)
+				else: hosts[channel.host] = [key]
+		if not hosts: raise Exception('there are no GPIO outputs in group '+name)
+		pins = 0
+		first = 0
+		last = 0
+		with self.outputsLock:
+			for host in hosts:
+				mask = 0
+				for key in hosts[host]: mask |= 1 << self.digitalList[key].gpio
+				for retry in (True, False):
+					try:
+						for key in hosts[host]: pi = self.outputPi(key)
+						start = time.perf_counter()
+						if level: pi.set_bank_1(mask)
+						else: pi.clear_bank_1(mask)
+						last = time.perf_counter()
+						if not first: first = start
+						break
+					except:
+						for key in hosts[host]:
+							if key in self.outputs: self.pool.release(self.outputs.pop(key))
+						if not retry: raise
+				pins += len(hosts[host])
+		# all pins changed within spread, across hosts it is the sum of the bank writes round trips
+		return {'pins': pins, 'hosts': len(hosts), 'spread': round((last - first)*1000, 3)}
+
+	def outputsRelease(self,host=False):
+		with self.outputsLock:
+			for key in list(self.outputs):
+				channel = False
+				if key in self.digitalList: channel = self.digitalList[key]
+				if not channel or channel.mode != 'out' or channel.host == host: self.pool.release(self.outputs.pop(key))
+
+	def reload(self):
+		settings = config.load(self.conf)
+		if settings is self.settings: return
+		if self.debug:
+			print('Reloading GPIO settings')
+			for i in settings.errors: print('GPIO settings error: '+i)
+		self.settings = settings
+		# unchanged channels keep their old objects, the subsystems only rebuild what is not identical
+		self.oneWlist = self.unchanged(self.oneWlist, settings.oneW)
+		self.pulselist = self.unchanged(self.pulselist, settings.pulses)
+		self.digitalList = self.unchanged(self.digitalList, settings.digital)
+		frame = self.resetSubscription()
+		if frame and self.ws: self.writer.putFrame(frame)
+		self.loop.run_in_executor(None, self.outputsRelease)
+		self.wake()
+
+	def wake(self):
+		changed = self.changed
+		self.changed = asyncio.Event()
+		changed.set()
+
+	async def health(self):
+		while True:
+			await asyncio.sleep(5)
+			for host in await self.loop.run_in_executor(None, self.pool.check): self.hostLost(host)
+
+	def hostLost(self,host):
+		if self.debug: print('Lost connection to pigpiod at '+host)
+		# channels on this host get new objects, so the subsystems recreate them on a fresh connection
+		pulselist = dict(self.pulselist)
+		if host == 'localhost':
+			for i in pulselist:
+				if pulselist[i].engine == 'pigpio' or pulselist[i].mode == 'frequency': pulselist[i] = copy.copy(pulselist[i])
+		digitalList = dict(self.digitalList)
+		for i in digitalList:
+			if digitalList[i].host == host: digitalList[i] = copy.copy(digitalList[i])
+		self.pulselist = pulselist
+		self.digitalList = digitalList
+		self.loop.run_in_executor(None, self.outputsRelease, host)
+		self.wake()
+
+	def unchanged(self,old,new):
+		channels = {}
+		for i in new:
+			if i in old and old[i] == new[i]: channels[i] = old[i]
+			else: channels[i] = new[i]
+		return channels
+
+	def oneWread(self,bus,sensor):
+		start = time.monotonic()
+		if bus.hasTemperature(sensor.id): value = bus.temperature(sensor.id)
+		else: value = sensor.get_temperature(Unit.KELVIN)
+		acquired = time.monotonic()
+		self.metrics.observe('read_seconds', acquired - start, kind='1W')
+		return {sensor.id: (value, acquired)}
+
+	def oneWbulk(self,bus,sids):
+		bus.trigger()
+		start = time.monotonic()
+		while time.monotonic() - start < 1.5:
+			time.sleep(0.05)
+			if not bus.converting(): break
+		acquired = time.monotonic() # all sensors on the bus converted together
+		self.metrics.observe('read_seconds', acquired - start, kind='1W bulk')
+		values = {}
+		for sid in sids:
+			try: values[sid] = (bus.temperature(sid), acquired)
+			except Exception as e: values[sid] = e
+		return values
+
+	def oneWscan(self,bus,bulk,oneWlist,resolutions):
+		sensors = {}
+		bulkSensors = []
+		for sensor in W1ThermSensor.get_available_sensors(): 
+			sensors[sensor.id] = sensor
+			if bulk and bus.bulkCapable(sensor.id): bulkSensors.append(sensor.id)
+			if sensor.id in oneWlist and not sensor.id in resolutions:
+				resolutions.append(sensor.id)
+				if oneWlist[sensor.id].resolution:
+					try: bus.setResolution(sensor.id, oneWlist[sensor.id].resolution)
+					except Exception as e: 
+						if self.debug: print('Setting GPIO 1W sensor '+sensor.id+' resolution error: '+str(e))
+		return sensors, bulkSensors
+
+	async def oneW(self):
+		bus = oneWireBus()
+		bulk = self.conf.get('GPIO', '1wbulk') != 'no' and bus.masters()
+		sensors = {}
+		bulkSensors = []
+		resolutions = []
+		scanned = None # scan right away, the monotonic clock can be below 30 s at boot
+		due = {}
+		pending = {}
+		# blocking sysfs reads run here so one slow sensor never delays the others, threads are only started when needed
+		pool = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='GPIO 1W')
+		channels = {}
+		templates = {}
+		bands = {}
+		try:
+			while True:
+				changed = self.changed
+				oneWlist = self.oneWlist
+				for sid in list(channels):
+					if not sid in oneWlist or not oneWlist[sid] is channels[sid]:
+						del channels[sid], templates[sid], bands[sid]
+						if sid in due: del due[sid]
+						if sid in resolutions: resolutions.remove(sid)
+						scanned = None
+				for sid in oneWlist:
+					if oneWlist[sid].sk and not sid in channels: 
+						channels[sid] = oneWlist[sid]
+						templates[sid] = skTemplate('OpenPlotter.GPIO.1W.'+sid, [oneWlist[sid].sk])
+						bands[sid] = deadbandSettings(oneWlist[sid])
+						scanned = None
+				if not channels and not pending:
+					await changed.wait()
+					continue
+				now = time.monotonic()
+				# the sysfs directory scan is cached, sensors are rarely plugged in or out
+				if scanned is None or now - scanned > 30:
+					sensors, bulkSensors = await self.loop.run_in_executor(pool, self.oneWscan, bus, bulk, oneWlist, resolutions)
+					scanned = now
+				inFlight = []
+				for i in pending.values(): inFlight.extend(i)
+				wait = 1.0
+				bulkDue = []
+				for sid in channels:
+					if not sid in sensors: continue
+					if sid in inFlight: continue
+					if not sid in due: due[sid] = now
+					if now >= due[sid]:
+						if sid in bulkSensors: bulkDue.append(sid)
+						else: pending[self.loop.run_in_executor(pool, self.oneWread, bus, sensors[sid])] = [sid]
+						due[sid] = now + channels[sid].rate
+					else: wait = min(wait, due[sid] - now)
+				if bulkDue: pending[self.loop.run_in_executor(pool, self.oneWbulk, bus, bulkDue)] = bulkDue
+				if not pending:
+					await asyncio.sleep(wait)
+					continue
+				done, notDone = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+				for future in done:
+					sids = pending.pop(future)
+					try: values = future.result()
+					except Exception as e: 
+						self.metrics.inc('read_errors_total', len(sids), kind='1W')
+						if self.debug: print('Reading GPIO 1W sensors '+str(sids)+' error: '+str(e))
+						continue
+					for sid in values:
+						if not sid in channels: continue # removed while it was being read
+						if isinstance(values[sid], Exception):
+							self.metrics.inc('read_errors_total', kind='1W')
+							if self.debug: print('Reading GPIO 1W sensor '+sid+' error: '+str(values[sid]))
+							continue
+						value, acquired = values[sid]
+						self.samples['1W.'+sid] = acquired
+						self.writer.putChanged(templates[sid], bands[sid], channels[sid].sk, channels[sid].offset+value, acquired)
+		finally: pool.shutdown(wait=False)
+
+	def pulseInstances(self,pulselist,instances,channels):
+		instances = dict(instances)
+		counters = {}
+		for i in list(instances):
+			if not i in pulselist or not pulselist[i] is channels[i]:
+				instance = instances.pop(i)['instance']
+				counters[i] = instance.counter
+				try: instance.cancel()
+				except Exception as e: 
+					if self.debug: print('Closing GPIO pulses error: '+str(e))
 		for i in pulselist:
-			if pulselist[i]['revCounter'] or pulselist[i]['revolutions'] or pulselist[i]['linearSpeed'] or pulselist[i]['distance']:
+			channel = pulselist[i]
+			if channel.enabled and not i in instances:
 				try:
-					self.instances[i] = {'instance': rpmReader(int(i), pulses_per_rev=pulselist[i]['pulsesPerRev'], pull=pulselist[i]['pull'])}
+					if channel.mode == 'frequency': instances[i] = {'instance': freqReader(channel.gpio, pulses_per_rev=channel.pulsesPerRev, pull=channel.pull, gate=channel.gate, reject=channel.reject)}
+					elif channel.engine == 'pigpio': instances[i] = {'instance': tickReader(channel.gpio, pulses_per_rev=channel.pulsesPerRev, pull=channel.pull, average=channel.average, reject=channel.reject, pool=self.pool, recorder=self.recorder)}
+					else: instances[i] = {'instance': rpmReader(channel.gpio, pulses_per_rev=channel.pulsesPerRev, pull=channel.pull, reject=channel.reject, recorder=self.recorder)}
+					if i in counters: instances[i]['instance'].counter = counters[i] # same input with new settings keeps counting
+					elif i in self.counters: instances[i]['instance'].counter = self.counters[i]
 				except Exception as e: 
 					if self.debug: print('Creating GPIO pulses error: '+str(e))
+		return instances
 
-		if self.instances:
-			ticks = {}
+	async def pulse(self):
+		self.instances = {}
+		pulselist = {}
+		channels = {}
+		templates = {}
+		bands = {}
+		ticks = {}
+		flushed = time.monotonic()
+		try:
 			while True:
-				time.sleep(0.1)
-				try:
+				changed = self.changed
+				if not self.pulselist is pulselist:
+					pulselist = self.pulselist
+					self.instances = await self.loop.run_in_executor(None, self.pulseInstances, pulselist, self.instances, channels)
+					for i in list(channels):
+						if not i in self.instances or not pulselist[i] is channels[i]: 
+							del channels[i], templates[i], bands[i]
+							if i in ticks: del ticks[i]
+					for i in self.instances:
+						if not i in channels:
+							channels[i] = pulselist[i]
+							templates[i] = skTemplate('OpenPlotter.GPIO.pulses.'+i, [pulselist[i].linearSpeed, pulselist[i].distance, pulselist[i].revolutions, pulselist[i].revCounter])
+							bands[i] = deadbandSettings(pulselist[i])
+				if not self.instances:
 					for i in pulselist:
-						values = ''
-						if not i in ticks: ticks[i] = time.time()
-						rate = pulselist[i]['rate']
-						radius = pulselist[i]['radius']
-						calibration = pulselist[i]['calibration']
-						rpm = self.instances[i]['instance'].rpm
-						counter = self.instances[i]['instance'].counter
-						if time.time() - self.instances[i]['instance'].t > 2: # min rpm = 30
-							hertz = 0
-							rps = 0
-						else:
-							hertz = rpm/60
-							rps = rpm*(math.pi/30)
-						if radius: 
-							lSpeed = rps*radius
-							distance = counter*((2*math.pi)*radius)
-							linearSpeedSK = pulselist[i]['linearSpeed']
-							if linearSpeedSK: values += '{"path":"'+linearSpeedSK+'","value":'+str(lSpeed*calibration)+'},'
-							distanceSK = pulselist[i]['distance']
-							if distanceSK: values += '{"path":"'+distanceSK+'","value":'+str(distance)+'},'
-						revolutionsSK = pulselist[i]['revolutions']
-						if revolutionsSK: values += '{"path":"'+revolutionsSK+'","value":'+str(hertz)+'},'
-						revCounterSK = pulselist[i]['revCounter']
-						if revCounterSK: values += '{"path":"'+revCounterSK+'","value":'+str(counter)+'},'
-						if time.time() - ticks[i] > rate:
-							if values:		
-								SignalK='{"updates":[{"$source":"OpenPlotter.GPIO.pulses.'+i+'","values":['
-								SignalK+=values[0:-1]+']}]}\n'	
-								try: 
-									if self.ws: 
-										self.ws.send(SignalK)
-										ticks[i] = time.time()
-									else:
-										for i in self.instances:
-											self.instances[i]['instance'].cancel()
-										self.instances = {}
-										return
-								except: 
-									if self.ws: self.ws.close()
-									self.ws = False
-									for i in self.instances:
-										self.instances[i]['instance'].cancel()
-									self.instances = {}
-									return
-				except Exception as e: 
-					if self.debug: print('Reading GPIO pulses error: '+str(e))
-					return
+						if pulselist[i].enabled: return # could not be created, try again later
+					await changed.wait()
+					continue
+				# sleep until the next channel is due instead of waking every 100 ms
+				wait = 1.0
+				for i in self.instances:
+					now = time.monotonic()
+					if not i in ticks: ticks[i] = now
+					channel = channels[i]
+					rate = channel.rate
+					if now - ticks[i] < rate:
+						wait = min(wait, ticks[i] + rate - now)
+						continue
+					ticks[i] = now
+					wait = min(wait, rate)
+					self.samples['pulses.'+i] = now
+					self.pulseValues(channel, templates[i], bands[i], self.instances[i]['instance'], now)
+				if time.monotonic() - flushed > self.counterStore.interval:
+					flushed = time.monotonic()
+					await self.loop.run_in_executor(None, self.counterStore.save, self.counterUpdate())
+				await asyncio.sleep(max(wait, 0.01))
+		finally:
+			try: self.counterStore.save(self.counterUpdate())
+			except Exception as e: 
+				if self.debug: print('Saving GPIO pulse counters error: '+str(e))
+			for i in self.instances:
+				self.instances[i]['instance'].cancel()
+			self.instances = {}
+
+	def pulseValues(self,channel,template,band,instance,now):
+		for path, value in pulseCompute(channel, instance.rpm, instance.counter, now - instance.t):
+			self.writer.putChanged(template, band, path, value, now)
 
-	def subscribe(self,pulselist):
+	def counterUpdate(self):
+		for i in self.instances: self.counters[i] = self.instances[i]['instance'].counter
+		for i in list(self.counters):
+			if not i in self.pulselist: del self.counters[i] # channel removed
+		return dict(self.counters)
+
+	def resetSubscription(self):
 		paths = ''
 		pathsList = {}
-		for i in pulselist:
-			if pulselist[i]['revCounter'] or pulselist[i]['distance']:
+		for i in self.pulselist:
+			if self.pulselist[i].resettable:
 				path = 'notifications.GPIO'+i+'.reset'
 				paths += '{"path":"'+path+'"},'
-				pathsList[i] = path
-
-		if paths:		
-			SignalK='{"context": "vessels.self","subscribe":['
-			SignalK+=paths[0:-1]+']}\n'	
-			try: 
-				if self.ws: self.ws.send(SignalK)
-				else: return
-			except: 
-				if self.ws: self.ws.close()
-				self.ws = False
-				return
+				pathsList[path] = i
+		if pathsList.keys() == self.resetPaths.keys(): return
+		self.resetPaths = pathsList
+		if not paths: return
+		SignalK='{"context": "vessels.self","subscribe":['
+		SignalK+=paths[0:-1]+']}\n'	
+		return SignalK
 
+	async def subscribe(self):
 		while True:
-			time.sleep(0.01)
-			try:
-				try: 
-					if self.ws: result = self.ws.recv()
-					else: return
-				except: 
-					if self.ws: self.ws.close()
-					self.ws = False
-					return
-				data = ujson.loads(result)
-				if 'updates' in data:
-					for update in data['updates']:
-						if 'values' in update:
-							for value in update['values']:
-								if 'path' in value:
-									for i in pathsList:
-										if value['path'] == pathsList[i]:
-											if 'value' in value:
-												if 'message' in value['value']:
-													if 'request' in value['value']['message']:
-														if i in self.instances:
-															if 'instance' in self.instances[i]: 
-																self.instances[i]['instance'].counter = 0
-																command = ['set-notification','notifications.GPIO'+i+'.reset','normal','done']
-																process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-																out, err = process.communicate()
-																if err:
-																	if self.debug: print('Error sending pulses GPIO notification: '+str(err))										
-			except Exception as e: 
-				if self.debug: print('Failed to reset GPIO pulses: '+str(e))
-				return
+			changed = self.changed
+			self.resetPaths = {}
+			SignalK = self.resetSubscription()
+			if not SignalK:
+				await changed.wait()
+				continue
+			await self.connected.wait()
+			ws = self.ws
+			if not ws: 
+				await asyncio.sleep(1)
+				continue
+			self.writer.putFrame(SignalK)
+			while self.ws is ws:
+				try: result = await self.loop.run_in_executor(self.receiver, ws.recv)
+				except Exception: 
+					self.dropped(ws)
+					break
+				try: self.reset(result)
+				except Exception as e: 
+					if self.debug: print('Failed to reset GPIO pulses: '+str(e))
+
+	def reset(self,result):
+		pathsList = self.resetPaths
+		data = ujson.loads(result)
+		if 'updates' in data:
+			for update in data['updates']:
+				if 'values' in update:
+					for value in update['values']:
+						if 'path' in value and value['path'] in pathsList:
+							i = pathsList[value['path']]
+							if 'value' in value and value['value']:
+								if 'message' in value['value']:
+									if 'request' in value['value']['message']:
+										if i in self.instances: self.resetCounter(i)
+
+	def resetCounter(self,i):
+		if 'instance' in self.instances[i]: 
+			self.instances[i]['instance'].counter = 0
+			self.loop.run_in_executor(None, self.counterStore.save, self.counterUpdate())
+			self.notify('OpenPlotter.GPIO.pulses.'+i,'notifications.GPIO'+i+'.reset','normal','done',False,False)
+
+	def template(self,source,path):
+		if not source in self.templates: self.templates[source] = skTemplate(source, [path])
+		elif not path in self.templates[source].keys: self.templates[source].keys[path] = '{"path":'+ujson.dumps(path)+',"value":'
+		return self.templates[source]
+
+	def notify(self,source,path,state,message,visual,sound,acquired=None):
+		# with a token the writer buffers it while SK is unreachable, set-notification could not reach SK either
+		if self.ws or self.conf.get('GPIO', 'token'):
+			method = []
+			if visual: method.append('visual')
+			if sound: method.append('sound')
+			self.writer.putNotice(self.template(source, path), path, ujson.dumps({'state':state,'message':message,'method':method}), acquired)
+			return
+		# no SK access of our own (access not requested or approved yet), set-notification has its own
+		command = ['set-notification']
+		if visual: command.append('-v')
+		if sound: command.append('-s')
+		command.append(path)
+		command.append(state)
+		command.append(message)
+		self.loop.call_soon_threadsafe(self.loop.run_in_executor, None, self.setNotification, command)
 
-	def digital(self,digitalList):
-		instances2 = {}
+	def setNotification(self,command):
+		start = time.monotonic()
+		process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+		out, err = process.communicate()
+		self.metrics.observe('set_notification_seconds', time.monotonic() - start)
+		if err:
+			if self.debug: print('Error sending GPIO notification: '+str(err))
+
+	def digitalNotify(self,instance,level,acquired=None):
+		if level == 0: notification = instance['low']
+		else: notification = instance['high']
+		self.notify('OpenPlotter.GPIO.digital.'+str(instance['gpio']),'notifications.GPIO'+str(instance['gpio']),notification['state'],notification['message'],notification['visual'],notification['sound'],acquired)
+
+	def digitalChange(self,instance,level,acquired=None):
+		if level > 1: return # watchdog timeout, not a level change
+		if instance['old'] != level:
+			if instance['old'] == 'init' and not instance['init']: instance['sent'] = level
+			instance['old'] = level
+			instance['acquired'] = acquired
+			self.digitalSend(instance)
+
+	def digitalSend(self,instance):
+		level = instance['old']
+		if instance['sent'] == level: return
+		now = time.monotonic()
+		if now < instance['next']:
+			# flapping input, only the latest level is sent once hold and rate allow it
+			if not instance['timer']: instance['timer'] = self.loop.call_later(instance['next']-now, self.digitalDeferred, instance)
+			return
+		instance['sent'] = level
+		self.digitalNotify(instance,level,instance['acquired'])
+		channel = instance['channel']
+		instance['next'] = now+channel.hold
+		if channel.rate:
+			times = instance['times']
+			times.append(now)
+			while times[0] <= now-60: times.popleft()
+			if len(times) >= channel.rate: instance['next'] = max(instance['next'], times[0]+60)
+
+	def digitalDeferred(self,instance):
+		instance['timer'] = None
+		if 'closed' in instance: return # removed on reload
+		self.digitalSend(instance)
+
+	def digitalInstances(self,digitalList,inputs,edge):
+		inputs = dict(inputs)
+		for i in list(inputs):
+			if not i in digitalList or not digitalList[i] is inputs[i]['channel']: self.digitalClose(inputs.pop(i))
 		for i in digitalList:
-			if digitalList[i]['mode'] == 'in':
+			channel = digitalList[i]
+			if channel.mode == 'in' and not i in inputs:
 				try:
-					items = i.split('-')
-					host = items[0]
-					gpio = int(items[1])
-					pi = pigpio.pi(host)
-					if not pi.connected: continue
+					gpio = channel.gpio
+					pi = self.pool.get(channel.host)
+					instance = {'channel': channel, 'pi': pi, 'gpio': gpio, 'high': channel.high, 'low': channel.low, 'init': channel.init, 'old':'init', 'sent':'init', 'acquired': None, 'next': 0, 'times': collections.deque(), 'timer': None, 'polled': None}
+					inputs[i] = instance
 					pi.set_mode(gpio, pigpio.INPUT)
-					if digitalList[i]['pull'] == 'up': pi.set_pull_up_down(gpio, pigpio.PUD_UP)
-					elif digitalList[i]['pull'] == 'down': pi.set_pull_up_down(gpio, pigpio.PUD_DOWN)
+					if channel.pull == 'up': pi.set_pull_up_down(gpio, pigpio.PUD_UP)
+					elif channel.pull == 'down': pi.set_pull_up_down(gpio, pigpio.PUD_DOWN)
 					else: pi.set_pull_up_down(gpio, pigpio.PUD_OFF)
-					instances2[i] = {'pi': pi, 'gpio': gpio, 'high': digitalList[i]['high'], 'low': digitalList[i]['low'], 'init': digitalList[i]['init'], 'old':'init'}
+					# pigpiod keeps filters after we disconnect, so they are always set or cleared
+					if channel.filter == 'glitch':
+						pi.set_noise_filter(gpio, 0, 0)
+						pi.set_glitch_filter(gpio, channel.steady)
+					elif channel.filter == 'noise':
+						pi.set_glitch_filter(gpio, 0)
+						pi.set_noise_filter(gpio, channel.steady, channel.active)
+					else:
+						pi.set_glitch_filter(gpio, 0)
+						pi.set_noise_filter(gpio, 0, 0)
+					if edge:
+						# pigpio delivers edges from its own notification thread, the callbacks only hand them over to the loop
+						instance['cb'] = pi.callback(gpio, pigpio.EITHER_EDGE, lambda gpio, level, tick, instance=instance: self.digitalEdge(instance, gpio, level, tick))
+						self.loop.call_soon_threadsafe(self.digitalChange, instance, pi.read(gpio))
 				except Exception as e: 
+					if i in inputs: self.digitalClose(inputs.pop(i))
 					if self.debug: print('Creating GPIO digital error: '+str(e))
+		return inputs
+
+	def digitalEdge(self,instance,gpio,level,tick):
+		# remote ticks are another daemon's clock, only local pins are recorded
+		if self.recorder and level < 2 and instance['channel'].host == 'localhost': self.recorder.record(gpio, level, tick)
+		self.loop.call_soon_threadsafe(self.digitalChange, instance, level, time.monotonic())
 
-		if instances2:
+	def digitalClose(self,instance):
+		instance['closed'] = True
+		try:
+			if 'cb' in instance: instance['cb'].cancel()
+		except: pass
+		try:
+			if instance['channel'].filter == 'glitch': instance['pi'].set_glitch_filter(instance['gpio'], 0)
+			elif instance['channel'].filter == 'noise': instance['pi'].set_noise_filter(instance['gpio'], 0, 0)
+		except: pass
+		self.pool.release(instance['pi'])
+
+	async def digital(self):
+		self.inputs = {}
+		self.polling = False
+		digitalList = {}
+		edge = self.conf.get('GPIO', 'digitalMode') != 'poll'
+		poller = None
+		try:
 			while True:
-				for i in instances2:
-					try:
-						level = instances2[i]['pi'].read(instances2[i]['gpio'])
-						if instances2[i]['old'] != level:
-							if instances2[i]['old'] == 'init' and not instances2[i]['init']: pass
-							else:
-								command = ['set-notification']
-								if level == 0: 
-									if instances2[i]['low']['visual']: command.append('-v')
-									if instances2[i]['low']['sound']: command.append('-s')
-								if level == 1: 
-									if instances2[i]['high']['visual']: command.append('-v')
-									if instances2[i]['high']['sound']: command.append('-s')
-								command.append('notifications.GPIO'+str(instances2[i]['gpio']))
-								if level == 0: 
-									command.append(instances2[i]['low']['state'])
-									command.append(instances2[i]['low']['message'])
-								if level == 1: 
-									command.append(instances2[i]['high']['state'])
-									command.append(instances2[i]['high']['message'])
-								process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-								out, err = process.communicate()
-								if err:
-									if self.debug: print('Error sending digital GPIO notification: '+str(err))
-							instances2[i]['old'] = level
-					except Exception as e: 
-						if self.debug: print('Reading GPIO digital error: '+str(e))
-						for i in instances2:
-							instances2[i]['pi'].stop()
-						instances2 = {}
-						return
-				time.sleep(0.01)
+				changed = self.changed
+				if not self.digitalList is digitalList:
+					digitalList = self.digitalList
+					self.inputs = await self.loop.run_in_executor(None, self.digitalInstances, digitalList, self.inputs, edge)
+				if not self.inputs:
+					for i in digitalList:
+						if digitalList[i].mode == 'in': return # could not be created, try again later
+					await changed.wait()
+					continue
+				if not edge:
+					if not poller: 
+						self.polling = True
+						poller = self.loop.run_in_executor(None, self.digitalPoll)
+					elif poller.done(): poller.result() # raises what stopped the poll thread
+				try: await asyncio.wait_for(changed.wait(), 5)
+				except asyncio.TimeoutError: pass # pigpiod connections are checked by the pool
+		finally:
+			self.polling = False
+			for i in self.inputs: self.digitalClose(self.inputs[i])
+			self.inputs = {}
+
+	def digitalPoll(self):
+		banks = {}
+		while self.polling:
+			# one read_bank_1 request per host and cycle instead of one read per input
+			hosts = {}
+			for instance in list(self.inputs.values()):
+				if not instance['pi'] in hosts: hosts[instance['pi']] = []
+				hosts[instance['pi']].append(instance)
+			last = banks
+			banks = {}
+			for pi in hosts:
+				start = time.monotonic()
+				try: bank = pi.read_bank_1()
+				except:
+					if all('closed' in i for i in hosts[pi]): continue # removed on reload
+					raise
+				acquired = time.monotonic()
+				self.metrics.observe('read_seconds', acquired - start, kind='digital bank')
+				changed = bank ^ last.get(pi, bank)
+				banks[pi] = bank
+				for instance in hosts[pi]:
+					bit = 1 << instance['gpio']
+					# only changes go to the loop, hold and rate timers live there
+					if changed & bit or instance['polled'] is None:
+						level = 0
+						if bank & bit: level = 1
+						instance['polled'] = level
+						if self.recorder and instance['channel'].host == 'localhost': self.recorder.record(instance['gpio'], level, int(acquired*1000000), recorder.monotonic)
+						self.loop.call_soon_threadsafe(self.digitalChange, instance, level, acquired)
+				for instance in hosts[pi]: self.samples['digital.'+instance['channel'].id] = acquired
+			time.sleep(0.01)
 
 ############################################################################################
 
 def main():
+	# reloadGpioRead() can send SIGHUP before the loop handles it, the default action would kill the reader
+	signal.signal(signal.SIGHUP, signal.SIG_IGN)
 	conf2 = conf.Conf()
 	enableX1 = False
 	enableX2 = False
 	enableX3 = False
 	enableX4 = False
 
-	data = conf2.get('GPIO', '1w')
-	try: oneWlist = eval(data)
-	except: oneWlist = {}
+	settings = config.load(conf2)
+	if conf2.get('GENERAL', 'debug') == 'yes':
+		for i in settings.errors: print('GPIO settings error: '+i)
+
+	# OPENPLOTTER_GPIO_SIM or GPIO/simulation, for machines without GPIO, pigpiod or 1-Wire
+	scenario = simulation.scenario(conf2, settings)
+	if scenario:
+		simulation.install(sys.modules[__name__], scenario)
+		if conf2.get('GENERAL', 'debug') == 'yes': print('Simulated GPIO hardware, 1W tree at '+simulation.w1Sensor.tree.root)
+
+	oneWlist = settings.oneW
 	for i in oneWlist:
-		if oneWlist[i]['sk']: enableX1 = True
+		if oneWlist[i].sk: enableX1 = True
 
-	data = conf2.get('GPIO', 'pulses')
-	try: pulselist = eval(data)
-	except: pulselist = {}
+	pulselist = settings.pulses
 	for i in pulselist:
-		if pulselist[i]['revCounter'] or pulselist[i]['revolutions'] or pulselist[i]['linearSpeed'] or pulselist[i]['distance']: enableX2 = True
-		if pulselist[i]['revCounter'] or pulselist[i]['distance']: enableX3 = True
+		if pulselist[i].enabled: enableX2 = True
+		if pulselist[i].resettable: enableX3 = True
 
-	data = conf2.get('GPIO', 'digital')
-	try: digitalList = eval(data)
-	except: digitalList = {}
+	digitalList = settings.digital
 	if digitalList: enableX4 = True
 
+	# all subsystems run once started, idle ones wait for a reload (SIGHUP) that gives them channels
 	if enableX1 or enableX2 or enableX3 or enableX4:
 		process = Process()
-		try: process.connect()
-		except Exception as e: 
-			if process.debug: print('Error connecting to SK: '+str(e))
-
-		if enableX1:
-			x1 = threading.Thread(target=process.oneW, args=(oneWlist,), daemon=True)
-			x1.start()
-		if enableX2:
-			x2 = threading.Thread(target=process.pulse, args=(pulselist,), daemon=True)
-			x2.start()
-		if enableX3:
-			x3 = threading.Thread(target=process.subscribe, args=(pulselist,), daemon=True)
-			x3.start()
-		if enableX4:
-			x4 = threading.Thread(target=process.digital, args=(digitalList,), daemon=True)
-			x4.start()
-
-		while True:
-			if not process.ws: 
-				try: process.connect()
-				except Exception as e: 
-					if process.debug: print('Error connecting to SK: '+str(e))
-			if enableX1:
-				if not x1.is_alive():
-					x1.join()
-					x1 = threading.Thread(target=process.oneW, args=(oneWlist,), daemon=True)
-					x1.start()
-			if enableX2:
-				if not x2.is_alive():
-					x2.join()
-					x2 = threading.Thread(target=process.pulse, args=(pulselist,), daemon=True)
-					x2.start()
-			if enableX3:
-				if not x3.is_alive():
-					x3.join()
-					x3 = threading.Thread(target=process.subscribe, args=(pulselist,), daemon=True)
-					x3.start()
-			if enableX4:
-				if not x4.is_alive():
-					x4.join()
-					x4 = threading.Thread(target=process.digital, args=(digitalList,), daemon=True)
-					x4.start()
-			time.sleep(5)
+		try: asyncio.run(process.run(settings))
+		except (KeyboardInterrupt, asyncio.CancelledError): pass
 
 if __name__ == '__main__':
-	main()
\ No newline at end of file
+	main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+# raw edges of the local pulse and digital inputs, recorded when GPIO/record is the path of a file.
+# A 16 bytes header (magic, wall clock time the file was started) is followed by 8 bytes records:
+# gpio, level, clock, a pad byte and the tick in microseconds, wrapping at 2^32. The clock tells pigpiod's
+# ticks from monotonic time, they are not comparable. Every start of the reader begins a new file.
+# openplotter-gpio-replay feeds recordings back through the pulse readers.
+
+import os, sys, time, mmap, struct, threading, argparse, json
+from . import config
+
+magic = b'OPGPIOE2'
+header = struct.Struct('<8sd')
+record = struct.Struct('<BBBxI')
+ticks = 0 # pigpiod, tickReader and digital edge callbacks
+monotonic = 1 # RPi.GPIO rpmReader and digital poll mode
+clocks = {ticks: 'pigpio', monotonic: 'monotonic'}
+
+class edgeRecorder:
+	# edges are packed in memory by the callbacks and written by flush, files rotate at size MB
+	def __init__(self, path, size=16, files=4):
+		self.path = path
+		self.maxBytes = int(size*1024*1024)
+		self.files = max(1, int(files))
+		self.lock = threading.Lock()
+		self.buffer = bytearray()
+		self.pack = record.pack
+		self.file = None
+		self.bytes = 0
+		self.lost = 0
+		self.started = False
+
+	def record(self, gpio, level, tick, clock=ticks):
+		# called from pigpio and RPi.GPIO callback threads and from the poll thread
+		with self.lock:
+			if len(self.buffer) > 4*1024*1024:
+				self.lost += 1 # flush is not keeping up, never block a callback
+				return
+			self.buffer += self.pack(gpio, level, clock, tick & 0xFFFFFFFF)
+
+	def flush(self):
+		with self.lock:
+			data = self.buffer
+			self.buffer = bytearray()
+		if not data: return
+		if not self.started:
+			# the ticks of the last run do not continue in this one
+			self.started = True
+			if os.path.exists(self.path) and os.path.getsize(self.path): self.rotate()
+		if self.file and self.bytes + len(data) > self.maxBytes: self.rotate()
+		if not self.file:
+			self.file = open(self.path, 'ab')
+			self.bytes = self.file.tell()
+			if not self.bytes:
+				self.file.write(header.pack(magic, time.time()))
+				self.bytes = header.size
+		self.file.write(data)
+		self.file.flush()
+		self.bytes += len(data)
+
+	def rotate(self):
+		if self.file: self.file.close()
+		self.file = None
+		for i in range(self.files-2, 0, -1): # the oldest file is overwritten
+			if os.path.exists(self.path+'.'+str(i)): os.replace(self.path+'.'+str(i), self.path+'.'+str(i+1))
+		if self.files > 1: os.replace(self.path, self.path+'.1')
+		else: os.unlink(self.path)
+
+	def close(self):
+		self.flush()
+		if self.file:
+			self.file.close()
+			self.file = None
+
+def edges(path):
+	# memory mapped, hours of edges are never loaded at once
+	with open(path, 'rb') as f:
+		if os.fstat(f.fileno()).st_size < header.size: return
+		mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+	try:
+		if mm[:len(magic)] != magic: raise Exception(path+' is not a GPIO edge recording of this version')
+		count = (len(mm) - header.size) // record.size
+		view = memoryview(mm)
+		data = view[header.size:header.size+count*record.size]
+		records = record.iter_unpack(data)
+		try:
+			for i in records: yield i
+		finally:
+			records = None
+			data.release()
+			view.release()
+	finally: mm.close()
+
+def replayChannel(args):
+	# the channel as configured on this machine if there is one, the command line wins
+	data = {}
+	try:
+		from openplotterSettings import conf
+		pulses = config.load(conf.Conf()).raw['pulses']
+		if str(args.gpio) in pulses: data = dict(pulses[str(args.gpio)])
+	except: pass
+	if not data: data = {'rate': 1.0, 'pulsesPerRev': 1, 'pull': 'down', 'revCounter': 'revCounter', 'revolutions': 'revolutions', 'linearSpeed': '', 'distance': '', 'radius': '', 'calibration': 1.0}
+	if args.rate is not None: data['rate'] = args.rate
+	if args.pulsesPerRev is not None: data['pulsesPerRev'] = args.pulsesPerRev
+	if args.engine is not None: data['engine'] = args.engine
+	if args.average is not None: data['average'] = args.average
+	if args.reject is not None: data['reject'] = args.reject
+	if args.radius is not None:
+		data['radius'] = args.radius
+		if not data['linearSpeed']: data['linearSpeed'] = 'linearSpeed'
+		if not data['distance']: data['distance'] = 'distance'
+	return config.PulseChannel(args.gpio, data)
+
+def main():
+	parser = argparse.ArgumentParser(prog='openplotter-gpio-replay', description='Feed a GPIO edge recording back through the pulse readers, one JSON line per reading.')
+	parser.add_argument('files', nargs='+', help='recording files, oldest first (file.2 file.1 file), each one is a run of the reader')
+	parser.add_argument('--gpio', type=int, help='GPIO to replay, the only one in the recording by default')
+	parser.add_argument('--clock', choices=['pigpio', 'monotonic'], help='clock of the edges to replay, the only one of the GPIO by default')
+	parser.add_argument('--speed', type=float, default=0, help='1 for real time, 10 for ten times faster, 0 (default) as fast as possible')
+	parser.add_argument('--engine', choices=['pigpio', 'RPi.GPIO'])
+	parser.add_argument('--pulses-per-rev', dest='pulsesPerRev', type=int)
+	parser.add_argument('--average', type=int)
+	parser.add_argument('--reject', type=float, help='milliseconds')
+	parser.add_argument('--rate', type=float, help='seconds between readings')
+	parser.add_argument('--radius', type=float)
+	parser.add_argument('--list', action='store_true', help='print the edges per GPIO and exit')
+	args = parser.parse_args()
+
+	if args.list or args.gpio is None or args.clock is None:
+		gpios = {}
+		for path in args.files:
+			for gpio, level, kind, tick in edges(path): 
+				if args.gpio is None or gpio == args.gpio: gpios[(gpio, clocks[kind])] = gpios.get((gpio, clocks[kind]), 0) + 1
+		if args.clock: 
+			for i in list(gpios): 
+				if i[1] != args.clock: del gpios[i]
+		if args.list or len(gpios) != 1:
+			for gpio, clock in sorted(gpios): print(json.dumps({'gpio': gpio, 'clock': clock, 'edges': gpios[(gpio, clock)]}))
+			if not args.list: print('Select one GPIO with --gpio and --clock', file=sys.stderr)
+			return
+		args.gpio, args.clock = list(gpios)[0]
+	source = {'pigpio': ticks, 'monotonic': monotonic}[args.clock]
+
+	from . import openplotterGpioRead
+	channel = replayChannel(args)
+	# the readers run on the recorded ticks instead of the clock
+	clock = [0.0]
+	due = 0.0
+	wall = time.monotonic()
+	for path in args.files:
+		# a new run of the reader, its ticks start over and so do the readers
+		if channel.engine == 'pigpio':
+			instance = openplotterGpioRead.tickReader.__new__(openplotterGpioRead.tickReader)
+			instance.initState(channel.pulsesPerRev, channel.average, channel.reject, lambda: clock[0])
+		else:
+			instance = openplotterGpioRead.rpmReader.__new__(openplotterGpioRead.rpmReader)
+			instance.initState(channel.gpio, channel.pulsesPerRev, channel.reject, lambda: clock[0])
+		last = None
+		for gpio, level, kind, tick in edges(path):
+			if gpio != channel.gpio or kind != source: continue
+			if last is None: last = tick
+			clock[0] += ((tick - last) & 0xFFFFFFFF) / 1000000.0
+			last = tick
+			while clock[0] >= due:
+				now = clock[0]
+				clock[0] = due
+				values = {'time': round(due, 6)}
+				for key, value in openplotterGpioRead.pulseCompute(channel, instance.rpm, instance.counter, due - instance.t): values[key] = value
+				print(json.dumps(values))
+				clock[0] = now
+				due += channel.rate
+			if args.speed:
+				wait = wall + clock[0]/args.speed - time.monotonic()
+				if wait > 0: time.sleep(wait)
+			if level: continue # both readers count falling edges
+			if channel.engine == 'pigpio': instance.fell(gpio, level, tick)
+			else: instance.fell(gpio)
+
+if __name__ == '__main__':
+	main()
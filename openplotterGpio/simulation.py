@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+# simulated pigpiod, RPi.GPIO and 1-Wire for openplotter-gpio-read on machines without the hardware.
+# OPENPLOTTER_GPIO_SIM (or GPIO/simulation) is "yes" for a scenario made from the settings or the path
+# of a JSON scenario file, for example:
+# {"seed": 1, "latency": 0.002, "hosts": {"boat2": {"latency": 0.02}},
+#  "pulses": {"17": {"script": [[10, 20.0], [10, 40.0], [5, 0]], "jitter": 0.01}},
+#  "inputs": {"localhost-5": {"period": 2.0, "bounce": 3}},
+#  "w1": {"conversion": 0.75, "sensors": {"28-000000000001": {"temperature": 293.15, "drift": 0.05}}}}
+# Edge times and temperatures only depend on the seed, so runs can be compared.
+
+import os, time, threading, heapq, itertools, random, tempfile, ujson
+
+def scenario(conf, settings):
+	value = os.environ.get('OPENPLOTTER_GPIO_SIM', '') or conf.get('GPIO', 'simulation')
+	if not value or value in ('no', '0'): return
+	data = {}
+	if not value in ('yes', '1'):
+		with open(value) as f: data = ujson.load(f)
+	for i in ('pulses', 'inputs', 'hosts', 'w1'):
+		if not i in data: data[i] = {}
+	if not 'sensors' in data['w1']: data['w1']['sensors'] = {}
+	# channels the scenario does not mention get a steady signal
+	for i in settings.pulses:
+		if settings.pulses[i].enabled and not i in data['pulses']: data['pulses'][i] = {'rate': 20.0}
+	for i in settings.digital:
+		if settings.digital[i].mode == 'in' and not i in data['inputs']: data['inputs'][i] = {'period': 10.0}
+	for i in settings.oneW:
+		if not i in data['w1']['sensors']: data['w1']['sensors'][i] = {}
+	return data
+
+class pulseTrain:
+	# falling edges at the scripted rates, each step of the script is [seconds, pulses per second]
+	def __init__(self, gpio, data, seed):
+		self.gpio = gpio
+		if 'script' in data: self.script = data['script']
+		else: self.script = [[3600, data['rate']]]
+		self.jitter = 0.0
+		if 'jitter' in data: self.jitter = float(data['jitter'])
+		self.duty = 0.5
+		if 'duty' in data: self.duty = float(data['duty'])
+		self.random = random.Random(seed)
+
+	def edges(self, start):
+		if not any(rate for seconds, rate in self.script): return
+		t = start
+		while True:
+			for seconds, rate in self.script:
+				end = t + seconds
+				if not rate:
+					t = end
+					continue
+				while t < end:
+					interval = 1.0/rate
+					if self.jitter: interval *= 1 + self.random.uniform(-self.jitter, self.jitter)
+					yield t, 0
+					yield t + interval*self.duty, 1
+					t += interval
+
+class digitalInput:
+	# toggles every period, every change can bounce a few times like a reed contact
+	def __init__(self, gpio, data, seed):
+		self.gpio = gpio
+		self.period = float(data['period'])
+		self.bounce = 0
+		if 'bounce' in data: self.bounce = int(data['bounce'])
+		self.bounceTime = 0.0005
+		if 'bounceTime' in data: self.bounceTime = float(data['bounceTime'])
+		self.level = 0
+		if 'level' in data: self.level = int(data['level'])
+
+	def edges(self, start):
+		t = start
+		level = self.level
+		while True:
+			t += self.period
+			level ^= 1
+			for i in range(self.bounce):
+				yield t + i*self.bounceTime, level
+				yield t + (i+0.5)*self.bounceTime, level ^ 1
+			yield t + self.bounce*self.bounceTime, level
+
+class fakeCallback:
+	def __init__(self, daemon, gpio, edge, func):
+		self.daemon = daemon
+		self.gpio = gpio
+		self.edge = edge
+		self.func = func
+		self.count = 0
+
+	def fire(self, level, tick):
+		if self.edge == pigpio.FALLING_EDGE and level: return
+		if self.edge == pigpio.RISING_EDGE and not level: return
+		self.count += 1
+		if self.func: self.func(self.gpio, level, tick)
+
+	def tally(self):
+		return self.count
+
+	def cancel(self):
+		self.daemon.remove(self)
+
+class fakeDaemon:
+	# one per host, a thread replays the edges of every source at their scripted time
+	def __init__(self, host, latency, sources):
+		self.host = host
+		self.latency = latency
+		self.requests = 0
+		self.lock = threading.Lock()
+		self.start = time.monotonic()
+		self.bank = 0
+		self.callbacks = []
+		self.filters = {} # gpio: steady microseconds
+		self.heap = []
+		self.sequence = itertools.count()
+		for source in sources:
+			if isinstance(source, digitalInput) and source.level: self.bank |= 1 << source.gpio
+			edges = source.edges(self.start)
+			self.push(source.gpio, edges)
+		self.thread = threading.Thread(target=self.run, name='GPIO simulation '+host, daemon=True)
+		self.thread.start()
+
+	def push(self, gpio, edges):
+		edge = next(edges, None)
+		if edge: heapq.heappush(self.heap, (edge[0], next(self.sequence), gpio, edge[1], edges))
+
+	def tick(self, t):
+		return int((t - self.start)*1000000) & 0xFFFFFFFF
+
+	def run(self):
+		while True:
+			if not self.heap:
+				time.sleep(1)
+				continue
+			due, sequence, gpio, level, edges = self.heap[0]
+			wait = due - time.monotonic()
+			if wait > 0:
+				time.sleep(min(wait, 0.1))
+				continue
+			heapq.heappop(self.heap)
+			self.push(gpio, edges)
+			# like pigpiod's glitch filter, levels that do not last "steady" are never reported
+			steady = self.filters.get(gpio, 0)
+			if steady:
+				following = False
+				for i in self.heap:
+					if i[2] == gpio:
+						following = i[0]
+						break
+				if following and (following - due)*1000000 < steady: continue
+			self.edge(gpio, level, self.tick(due))
+
+	def edge(self, gpio, level, tick):
+		bit = 1 << gpio
+		with self.lock:
+			if bool(self.bank & bit) == bool(level): return
+			self.bank ^= bit
+			callbacks = [i for i in self.callbacks if i.gpio == gpio]
+		for i in callbacks: i.fire(level, tick)
+
+	def request(self):
+		# a round trip to the daemon, localhost or over the network
+		self.requests += 1
+		if self.latency: time.sleep(self.latency)
+
+	def remove(self, callback):
+		with self.lock:
+			if callback in self.callbacks: self.callbacks.remove(callback)
+
+class fakePi:
+	# the part of pigpio.pi the reader and actions use
+	def __init__(self, host='localhost', port=8888):
+		self.daemon = daemon(host)
+		self.connected = True
+
+	def set_mode(self, gpio, mode):
+		self.daemon.request()
+
+	def set_pull_up_down(self, gpio, pud):
+		self.daemon.request()
+
+	def set_glitch_filter(self, gpio, steady):
+		self.daemon.request()
+		self.daemon.filters[gpio] = steady
+
+	def set_noise_filter(self, gpio, steady, active):
+		self.daemon.request()
+		self.daemon.filters[gpio] = steady
+
+	def read(self, gpio):
+		self.daemon.request()
+		return (self.daemon.bank >> gpio) & 1
+
+	def read_bank_1(self):
+		self.daemon.request()
+		return self.daemon.bank
+
+	def write(self, gpio, level):
+		self.daemon.request()
+		self.daemon.edge(gpio, level, self.daemon.tick(time.monotonic()))
+
+	def set_bank_1(self, bits):
+		self.daemon.request()
+		for gpio in range(32):
+			if bits & (1 << gpio): self.daemon.edge(gpio, 1, self.daemon.tick(time.monotonic()))
+
+	def clear_bank_1(self, bits):
+		self.daemon.request()
+		for gpio in range(32):
+			if bits & (1 << gpio): self.daemon.edge(gpio, 0, self.daemon.tick(time.monotonic()))
+
+	def get_current_tick(self):
+		self.daemon.request()
+		return self.daemon.tick(time.monotonic())
+
+	def callback(self, gpio, edge=0, func=None):
+		self.daemon.request()
+		callback = fakeCallback(self.daemon, gpio, edge, func)
+		with self.daemon.lock: self.daemon.callbacks.append(callback)
+		return callback
+
+	def stop(self):
+		self.connected = False
+
+class fakePigpio:
+	# stands in for the pigpio module
+	INPUT = 0
+	OUTPUT = 1
+	PUD_OFF = 0
+	PUD_DOWN = 1
+	PUD_UP = 2
+	RISING_EDGE = 0
+	FALLING_EDGE = 1
+	EITHER_EDGE = 2
+	pi = fakePi
+
+pigpio = fakePigpio
+
+class fakeGPIO:
+	# stands in for RPi.GPIO, edges come from the localhost daemon
+	BCM = 11
+	IN = 1
+	OUT = 0
+	PUD_OFF = 20
+	PUD_DOWN = 21
+	PUD_UP = 22
+	RISING = 31
+	FALLING = 32
+	BOTH = 33
+
+	def __init__(self):
+		self.events = {}
+
+	def setmode(self, mode): pass
+
+	def setwarnings(self, warnings): pass
+
+	def setup(self, gpio, direction, pull_up_down=20): pass
+
+	def add_event_detect(self, gpio, edge, callback=None):
+		if edge == self.RISING: edge = pigpio.RISING_EDGE
+		elif edge == self.FALLING: edge = pigpio.FALLING_EDGE
+		else: edge = pigpio.EITHER_EDGE
+		self.events[gpio] = fakePi().callback(gpio, edge, lambda gpio, level, tick: callback(gpio))
+
+	def remove_event_detect(self, gpio):
+		if gpio in self.events: self.events.pop(gpio).cancel()
+
+	def cleanup(self, gpio=None): pass
+
+class w1Tree:
+	# a /sys/bus/w1/devices tree in a temporary folder, a thread plays the kernel's bulk conversion
+	def __init__(self, data, seed):
+		self.root = tempfile.mkdtemp(prefix='openplotter-gpio-w1-')
+		self.conversion = None # seconds, by resolution like a DS18B20 when not set
+		if 'conversion' in data: self.conversion = float(data['conversion'])
+		self.bulk = True
+		if 'bulk' in data: self.bulk = bool(data['bulk'])
+		self.sensors = {}
+		self.converted = 0
+		master = self.root+'/w1_bus_master1'
+		os.mkdir(master)
+		if self.bulk: self.write(master+'/therm_bulk_read', '1')
+		index = 0
+		for sid in sorted(data['sensors']):
+			sensor = data['sensors'][sid]
+			temperature = 293.15
+			if 'temperature' in sensor: temperature = float(sensor['temperature'])
+			drift = 0.05
+			if 'drift' in sensor: drift = float(sensor['drift'])
+			self.sensors[sid] = [temperature, drift, random.Random(seed+index)]
+			index += 1
+			os.mkdir(self.root+'/'+sid)
+			self.write(self.root+'/'+sid+'/resolution', '12')
+			ext_power = '1'
+			if 'parasite' in sensor and sensor['parasite']: ext_power = '0'
+			self.write(self.root+'/'+sid+'/ext_power', ext_power)
+			self.update(sid)
+		if self.bulk: threading.Thread(target=self.run, name='GPIO simulation 1W', daemon=True).start()
+
+	def write(self, path, data):
+		with open(path, 'w') as f: f.write(data+'\n')
+
+	def conversionTime(self, sid):
+		if self.conversion is not None: return self.conversion
+		try:
+			with open(self.root+'/'+sid+'/resolution') as f: bits = int(f.read())
+		except: bits = 12
+		return {9: 0.094, 10: 0.188, 11: 0.375}.get(bits, 0.75)
+
+	def update(self, sid):
+		sensor = self.sensors[sid]
+		sensor[0] += sensor[2].uniform(-sensor[1], sensor[1])
+		self.write(self.root+'/'+sid+'/temperature', str(int(round((sensor[0]-273.15)*1000))))
+
+	def convert(self, sid):
+		# a single read waits for its own conversion unless a bulk conversion just finished
+		if time.monotonic() - self.converted < self.conversionTime(sid): return
+		time.sleep(self.conversionTime(sid))
+		self.update(sid)
+
+	def run(self):
+		path = self.root+'/w1_bus_master1/therm_bulk_read'
+		while True:
+			time.sleep(0.002)
+			try:
+				with open(path) as f: state = f.read().strip()
+			except: continue
+			if state != 'trigger': continue
+			self.write(path, '-1')
+			time.sleep(max([self.conversionTime(sid) for sid in self.sensors] or [0]))
+			for sid in self.sensors: self.update(sid)
+			self.converted = time.monotonic()
+			self.write(path, '1')
+
+class w1Bus:
+	# the reader's sysfs bus on the fake tree
+	def __init__(self, bus, tree):
+		self.bus = bus
+		self.tree = tree
+
+	def __getattr__(self, name):
+		return getattr(self.bus, name)
+
+	def temperature(self, sid):
+		self.tree.convert(sid)
+		return self.bus.temperature(sid)
+
+class w1Sensor:
+	# stands in for W1ThermSensor, tree is set by install
+	tree = None
+
+	def __init__(self, sid):
+		self.id = sid
+
+	@classmethod
+	def get_available_sensors(cls):
+		return [cls(sid) for sid in sorted(cls.tree.sensors)]
+
+	def get_temperature(self, unit):
+		self.tree.convert(self.id)
+		with open(self.tree.root+'/'+self.id+'/temperature') as f: return int(f.read()) / 1000.0 + 273.15
+
+class w1Unit:
+	KELVIN = 'kelvin'
+
+daemons = {}
+daemonsLock = threading.Lock()
+settings = {}
+
+def daemon(host):
+	with daemonsLock:
+		if not host in daemons:
+			seed = settings.get('seed', 0)
+			latency = settings.get('latency', 0.0)
+			if host in settings['hosts'] and 'latency' in settings['hosts'][host]: latency = settings['hosts'][host]['latency']
+			sources = []
+			index = 0
+			if host == 'localhost':
+				for gpio in sorted(settings['pulses']):
+					sources.append(pulseTrain(int(gpio), settings['pulses'][gpio], seed+index))
+					index += 1
+			for key in sorted(settings['inputs']):
+				items = key.split('-')
+				if items[0] == host: sources.append(digitalInput(int(items[1]), settings['inputs'][key], seed+index))
+				index += 1
+			daemons[host] = fakeDaemon(host, float(latency), sources)
+		return daemons[host]
+
+def install(module, data):
+	# swaps the hardware modules of the reader for the simulated ones
+	settings.clear()
+	settings.update(data)
+	module.pigpio = fakePigpio
+	module.GPIO = fakeGPIO()
+	tree = w1Tree(data['w1'], data.get('seed', 0))
+	w1Sensor.tree = tree
+	module.W1ThermSensor = w1Sensor
+	module.Unit = w1Unit
+	bus = module.oneWireBus
+	module.oneWireBus = lambda root=None: w1Bus(bus(tree.root), tree)
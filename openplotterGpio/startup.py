@@ -19,6 +19,7 @@ import os, sys, subprocess, ujson, time
 from openplotterSettings import language
 from openplotterSettings import platform
 from openplotterSignalkInstaller import connections
+from . import config
 
 class Start():
 	def __init__(self, conf, currentLanguage):
@@ -34,15 +35,10 @@ class Start():
 		red = ''
 
 		if self.conf.get('GENERAL', 'rescue') != 'yes':
-			data = self.conf.get('GPIO', '1w')
-			try: oneWlist = eval(data)
-			except: oneWlist = {}
-			data = self.conf.get('GPIO', 'pulses')
-			try: pulseslist = eval(data)
-			except: pulseslist = {}
-			data = self.conf.get('GPIO', 'digital')
-			try: digitalList = eval(data)
-			except: digitalList = {}
+			settings = config.load(self.conf)
+			oneWlist = settings.oneW
+			pulseslist = settings.pulses
+			digitalList = settings.digital
 			if oneWlist or pulseslist or digitalList:
 				subprocess.call(['pkill', '-f', 'openplotter-gpio-read'])
 				subprocess.Popen('openplotter-gpio-read')
@@ -104,9 +100,8 @@ class Check():
 			else: black+= ' | '+msg
 
 		#1W
-		data = self.conf.get('GPIO', '1w')
-		try: oneWlist = eval(data)
-		except: oneWlist = {}
+		settings = config.load(self.conf)
+		oneWlist = settings.oneW
 		if oneWlist:
 			try: 
 				subprocess.check_output('ls /sys/bus/w1/', shell=True).decode(sys.stdin.encoding)
@@ -129,9 +124,7 @@ class Check():
 				else: black+= ' | '+msg
 
 		#pulses
-		data = self.conf.get('GPIO', 'pulses')
-		try: pulseslist = eval(data)
-		except: pulseslist = {}
+		pulseslist = settings.pulses
 		if pulseslist:
 			msg = _('pulses enabled')
 			if not black: black = msg
@@ -142,9 +135,7 @@ class Check():
 			else: black+= ' | '+msg
 
 		#digital
-		data = self.conf.get('GPIO', 'digital')
-		try: digitalList = eval(data)
-		except: digitalList = {}
+		digitalList = settings.digital
 		if digitalList:
 			msg = _('digital enabled')
 			if not black: black = msg
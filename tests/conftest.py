@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+
+# openplotterSettings only exists on an OpenPlotter image, the readers import its conf and platform
+# modules but the tests build their processes without them
+
+import sys, types
+
+try: import openplotterSettings
+except ImportError:
+	settings = types.ModuleType('openplotterSettings')
+	for name in ('conf', 'platform'):
+		module = types.ModuleType('openplotterSettings.'+name)
+		setattr(settings, name, module)
+		sys.modules['openplotterSettings.'+name] = module
+	sys.modules['openplotterSettings'] = settings
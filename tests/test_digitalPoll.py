@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+# poll mode against a fake pigpio that counts requests, one read_bank_1 per host and cycle
+
+from openplotterGpio import openplotterGpioRead, config, metrics
+
+class fakePi:
+	def __init__(self, process, banks):
+		self.process = process
+		self.banks = banks # bank returned on each cycle
+		self.requests = 0
+
+	def read_bank_1(self):
+		cycle = self.requests
+		self.requests += 1
+		if self.requests == len(self.banks): self.process.polling = False # this cycle is the last
+		return self.banks[cycle]
+
+	def read(self, gpio):
+		raise AssertionError('one request per input')
+
+class fakeLoop:
+	def __init__(self):
+		self.changes = []
+
+	def call_soon_threadsafe(self, callback, instance, level, acquired):
+		self.changes.append((instance['channel'].id, level))
+
+def poll(hosts):
+	process = openplotterGpioRead.Process.__new__(openplotterGpioRead.Process)
+	process.debug = False
+	process.metrics = metrics.registry()
+	process.recorder = None
+	process.samples = {}
+	process.loop = fakeLoop()
+	process.inputs = {}
+	pis = {}
+	for host in hosts:
+		pis[host] = fakePi(process, hosts[host]['banks'])
+		for gpio in hosts[host]['gpios']:
+			key = host+'-'+str(gpio)
+			channel = config.DigitalChannel(key, {'mode': 'in', 'pull': 'up', 'init': True, 'high': {}, 'low': {}})
+			process.inputs[key] = {'channel': channel, 'pi': pis[host], 'gpio': gpio, 'polled': None}
+	process.polling = True
+	process.digitalPoll()
+	return pis, process.loop.changes
+
+def test_one_bank_read_per_host_and_cycle():
+	banks = [0, 1<<5, 1<<5, 0]
+	pis, changes = poll({'localhost': {'gpios': [5, 6, 13], 'banks': banks}, 'boat2': {'gpios': [7, 8], 'banks': banks}})
+	for host in pis: assert pis[host].requests == len(banks)
+
+def test_only_changed_bits_are_notified():
+	banks = [
+		0,
+		1<<6 | 1<<9, # 6 changes, 9 is not an input
+		1<<6 | 1<<9 | 1<<13, # 13 changes
+		1<<13, # 6 and 9 change, only 6 is an input
+		1<<13, # nothing changes
+	]
+	pis, changes = poll({'localhost': {'gpios': [5, 6, 13], 'banks': banks}})
+	assert changes == [
+		('localhost-5', 0), ('localhost-6', 0), ('localhost-13', 0), # first level of every input
+		('localhost-6', 1),
+		('localhost-13', 1),
+		('localhost-6', 0),
+	]
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# This file is part of OpenPlotter.
+# Copyright (C) 2022 by Sailoog <https://github.com/openplotter/openplotter-gpio>
+#
+# Openplotter is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 2 of the License, or
+# any later version.
+# Openplotter is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Openplotter. If not, see <http://www.gnu.org/licenses/>.
+
+# bulk conversion on a fake /sys/bus/w1 tree, no 1-Wire hardware needed
+
+import time, pytest
+
+from openplotterGpio import openplotterGpioRead, simulation, metrics
+
+conversion = 0.2 # seconds
+
+def process():
+	process = openplotterGpioRead.Process.__new__(openplotterGpioRead.Process)
+	process.debug = False
+	process.metrics = metrics.registry()
+	return process
+
+def tree(sensors, parasite=False):
+	data = {'conversion': conversion, 'sensors': {}}
+	for i in range(sensors): data['sensors']['28-00000000000'+str(i)] = {'temperature': 290.0+i, 'drift': 0.0, 'parasite': parasite}
+	return simulation.w1Tree(data, 0)
+
+def test_bulk_samples_all_sensors_in_one_conversion():
+	w1 = tree(8)
+	bus = openplotterGpioRead.oneWireBus(w1.root)
+	assert bus.masters() == ['w1_bus_master1']
+	sids = sorted(w1.sensors)
+	for sid in sids: assert bus.bulkCapable(sid)
+	start = time.monotonic()
+	values = process().oneWbulk(bus, sids)
+	elapsed = time.monotonic() - start
+	assert sorted(values) == sids
+	assert elapsed < 2*conversion # one conversion period, not eight
+	acquired = set(values[sid][1] for sid in sids)
+	assert len(acquired) == 1 # sampled together
+	for i in range(len(sids)): assert values[sids[i]][0] == pytest.approx(290.0+i, abs=0.001)
+
+def test_parasite_sensors_fall_back_to_single_reads():
+	w1 = tree(3, parasite=True)
+	bus = openplotterGpioRead.oneWireBus(w1.root)
+	for sid in w1.sensors: assert not bus.bulkCapable(sid)
+	# each single read waits for its own conversion
+	bus = simulation.w1Bus(bus, w1)
+	start = time.monotonic()
+	for sid in sorted(w1.sensors): bus.temperature(sid)
+	assert time.monotonic() - start >= 3*conversion